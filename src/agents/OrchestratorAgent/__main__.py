@@ -9,8 +9,18 @@ from a2a.server.tasks import InMemoryTaskStore
 from a2a.server.apps import A2AStarletteApplication
 from src.common.logger.logger import get_logger
 from src.common.auth.auth import Auth
+from src.common.agent_registry.agent_connector import agent_connector
+from src.common.agent_registry.agent_health import agent_health
+from src.common.agent_registry.agent_registry import agent_registry
+from src.common.db.pool import postgres_pool
+from src.common.db.Postgre import ConversationHistoryManager
+from src.common.db.history_writer import history_writer
+from src.common.db.retention import ConversationRetention
+from src.common.metrics.metrics import metrics
 from fastapi import Request, HTTPException
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from contextlib import asynccontextmanager
 
 
 logger = get_logger("OrchAgent-M2M_Validation")
@@ -70,6 +80,37 @@ class M2MMiddleware(BaseHTTPMiddleware):
         return await call_next(request)
 
 
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Open shared resources at startup and release them at shutdown.
+    """
+    await postgres_pool.open()
+    await ConversationHistoryManager()._create_table()
+    await history_writer.start()
+    retention = ConversationRetention()
+    await retention.start()
+    await agent_registry.start()
+    await agent_health.start(agent_registry.card_urls)
+    agent_executor = getattr(app.state, "agent_executor", None)
+    if agent_executor is not None:
+        await agent_executor.agent.initialize()
+    try:
+        yield
+    finally:
+        await agent_health.stop()
+        await agent_connector.close()
+        await agent_registry.stop()
+        await retention.stop()
+        await history_writer.stop()
+        await postgres_pool.close()
+
+
+async def metrics_endpoint(request: Request) -> JSONResponse:
+    postgres_pool.stats()
+    return JSONResponse(metrics.snapshot())
+
+
 def main():
     """
     Main function to create and run the orchestrator agent.
@@ -121,15 +162,18 @@ def main():
         capabilities=AgentCapabilities(streaming=True),
     )
 
+    agent_executor = OrchestratorAgentExecutor()
     request_handler = DefaultRequestHandler(
-        agent_executor=OrchestratorAgentExecutor(), task_store=InMemoryTaskStore()
+        agent_executor=agent_executor, task_store=InMemoryTaskStore()
     )
 
     server = A2AStarletteApplication(
         agent_card=agent_card, http_handler=request_handler
     )
 
-    app = server.build()
+    app = server.build(lifespan=lifespan)
+    app.state.agent_executor = agent_executor
+    app.add_route("/metrics", metrics_endpoint, methods=["GET"])
     app.add_middleware(M2MMiddleware)
     uvicorn.run(app, host=host, port=port)
 
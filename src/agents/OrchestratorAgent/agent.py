@@ -1,75 +1,239 @@
 from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.tools.function_tool import FunctionTool
+from google.adk.tools.tool_context import ToolContext
 from src.common.config.prompts import AgentPrompts
 from src.common.config.constants import LlmConfig
+from src.common.config.config import (
+    DatabaseConfig,
+    DeadlineConfig,
+    DelegationConfig,
+    LlmCacheConfig,
+    McpConfig,
+    OrchestratorConfig,
+)
 from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.llm_request import LlmRequest
 from google.adk import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
+from mcp.types import CallToolResult, TextContent
 from collections.abc import AsyncIterable
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+import contextvars
+import time
 import uuid
-from src.common.agent_registry.agent_registry import AgentRegistry
+from src.common.agent_registry.agent_health import agent_health
+from src.common.agent_registry.agent_registry import agent_registry
 from src.common.auth.auth import OAuth
-from src.common.agent_registry.agent_connector import AgentConnector
+from src.common.agent_registry.agent_connector import agent_connector
+from src.common.agent_registry.fan_out import fan_out
 import uuid
 from src.common.db.Postgre import ConversationHistoryManager
+from src.common.db.history_writer import history_writer
+from src.common.db.history_cache import history_cache
 import json
 import re
 from src.common.logger.logger import get_logger
 from src.common.mcp_registry.mcp_connector import MCPConnector
+from src.common.context.deadline import within_deadline
+from src.common.context.turn_context import TurnContext, current_turn
+from src.common.metrics.metrics import metrics
+from src.common.agent_registry.routing_index import RouteMatch
+from src.common.llm.hedged import HedgedLlm
+from src.common.llm.prompt_assembly import PromptAssembler, compact_json
+from src.common.llm.response_cache import CachedLlm
+from src.common.llm.tiered import TieredLlm
+from src.common.llm.usage import register_prompt_usage_logger
+from src.agents.OrchestratorAgent.routing_rules import (
+    OPERATOR_HANDOFF,
+    RouteDecision,
+    RoutingRules,
+)
 
 logger = get_logger("Agent")
 
 
 class OrchestratorAgent:
     def __init__(self):
-        self._user_id = None
-        self._agent_registry = AgentRegistry()
+        self._agent_registry = agent_registry
         self._agent_auth = OAuth()
-        self._agent_connector = AgentConnector()
+        self._agent_connector = agent_connector
         self._conversation_history_manger = ConversationHistoryManager()
         self._agent = None
         self._runner = None
-        self._context_id = None
         self._mcp_connector = MCPConnector()
-
-    async def _initialize(self):
-        """Initialize async components"""
-        logger.info("Agent initialized")
-        self._agent = await self._build_agent()
-        self._runner = Runner(
-            app_name=AgentPrompts.OrchestratorAgent.NAME,
-            agent=self._agent,
-            session_service=InMemorySessionService(),
+        self._mcp_tools = []
+        self._mcp_loaded_at = 0.0
+        self._mcp_refresh: Optional[asyncio.Task] = None
+        self._routing_rules = RoutingRules()
+        self._prompt = PromptAssembler(
+            model=LlmConfig.Anthropic.SONET_4_MODEL,
+            instruction=AgentPrompts.OrchestratorAgent.INSTRUCTION,
+            history=AgentPrompts.OrchestratorAgent.HISTORY,
+            budget=OrchestratorConfig.HISTORY_TOKEN_BUDGET,
         )
+        self._init_lock = asyncio.Lock()
+
+    async def initialize(self):
+        """Build the long-lived agent and runner once"""
+        async with self._init_lock:
+            if self._runner is not None:
+                return
+            register_prompt_usage_logger()
+            self._agent = await self._build_agent()
+            self._runner = Runner(
+                app_name=AgentPrompts.OrchestratorAgent.NAME,
+                agent=self._agent,
+                session_service=InMemorySessionService(),
+            )
+            logger.info("Agent initialized")
 
     async def _build_agent(self) -> LlmAgent:
-        mcp_tools = await self._mcp_connector.get_tools()
-        agentlist = await self._agent_registry.get_agents_list()
+        await self._load_mcp_tools()
+        return LlmAgent(
+            name=AgentPrompts.OrchestratorAgent.NAME,
+            instruction=self._build_instruction,
+            description=AgentPrompts.OrchestratorAgent.DESCRIPTION,
+            model=self._build_model(),
+            before_model_callback=self._inject_history,
+            tools=self._tools(),
+            # Prior turns reach the model through the instruction's history
+            # section only, not through the long-lived ADK session events
+            include_contents="none",
+        )
+
+    def _tools(self) -> list:
+        tools = [FunctionTool(self.redirect_agent), FunctionTool(self.fan_out_agents)]
+        if self._mcp_tools:
+            return [*tools, *self._mcp_tools]
+        # No MCP server reachable: keep the handoff available locally
+        return [*tools, FunctionTool(self.operator_handoff)]
+
+    async def _load_mcp_tools(self):
+        """Discover the MCP toolsets and swap them into the live agent"""
+        self._mcp_tools = await self._mcp_connector.get_tools()
+        self._mcp_loaded_at = time.monotonic()
+        if not self._mcp_tools:
+            logger.warning("No MCP tools discovered, using the local operator handoff")
+        if self._agent is not None:
+            self._agent.tools = self._tools()
+
+    def _refresh_mcp_tools(self):
+        """
+        Rediscover MCP tools in the background every MCP_REFRESH_INTERVAL,
+        or every MCP_RETRY_INTERVAL while none were found, so a server that
+        was down at boot is picked up once it is back.
+        """
+        interval = (
+            McpConfig.REFRESH_INTERVAL if self._mcp_tools else McpConfig.RETRY_INTERVAL
+        )
+        if time.monotonic() - self._mcp_loaded_at < interval:
+            return
+        if self._mcp_refresh is not None and not self._mcp_refresh.done():
+            return
+        # A fresh context: discovery is not bounded by this turn's deadline
+        self._mcp_refresh = asyncio.create_task(
+            self._load_mcp_tools(), context=contextvars.Context()
+        )
+
+    def _build_model(self):
+        tiers = [self._build_tier(model) for model in OrchestratorConfig.MODEL_TIERS]
+        return tiers[0] if len(tiers) == 1 else TieredLlm(tiers)
+
+    @staticmethod
+    def _build_tier(model_name: str):
+        kwargs = {}
+        if OrchestratorConfig.PROMPT_CACHING:
+            # The system message is the static prefix, see _build_instruction
+            kwargs["cache_control_injection_points"] = [
+                {"location": "message", "index": 0}
+            ]
+        fallback = None
+        if OrchestratorConfig.LLM_FALLBACK_MODEL:
+            fallback = LiteLlm(model=OrchestratorConfig.LLM_FALLBACK_MODEL)
+        model = HedgedLlm(LiteLlm(model=model_name, **kwargs), fallback=fallback)
+        return CachedLlm(model) if LlmCacheConfig.ENABLED else model
+
+    async def _build_instruction(self, ctx: ReadonlyContext) -> str:
+        """Render the static instruction prefix: rules, agent list and cards"""
+        # Agents with an open circuit are left out so the router picks
+        # one that can answer
+        agentlist = [
+            agent
+            for agent in await self._agent_registry.get_agents_list()
+            if agent_health.is_available(agent)
+        ]
         logger.info(f"agentlist{agentlist}")
-        agentcards = await self._agent_registry.get_context_cards()
+        agentcards = [
+            card
+            for card in await self._agent_registry.get_context_cards()
+            if card["name"] in agentlist
+        ]
         logger.info("Get all agentcards from the registry")
-        conversation_history = await self._conversation_history_manger.fetch_last_n(
-            self._context_id, 8
+        return self._prompt.static_prefix(agentlist, agentcards)
+
+    async def _inject_history(
+        self, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> None:
+        """
+        Prepend the token-budgeted history to the user message. Keeping it
+        out of the system instruction leaves that prefix cacheable.
+        """
+        conversation_history = await history_cache.get_or_load(
+            current_turn().context_id,
+            DatabaseConfig.HISTORY_CACHE_MAX_TURNS,
+            self._load_history,
+            self._history_seq,
         )
         logger.info(f"Fetch Conversation history for context:{conversation_history}")
-        agentlist_str = json.dumps(agentlist, indent=2)
-        agentcards_str = json.dumps(agentcards, indent=2)
-        return LlmAgent(
-            name=AgentPrompts.OrchestratorAgent.NAME,
-            instruction=AgentPrompts.OrchestratorAgent.INSTRUCTION.format(
-                conversation_history=conversation_history,
-                agentlist=agentlist_str,
-                agentcards=agentcards_str,
-            ),
-            description=AgentPrompts.OrchestratorAgent.DESCRIPTION,
-            model=LiteLlm(model=LlmConfig.Anthropic.SONET_4_MODEL),
-            tools=[
-                FunctionTool(self.redirect_agent),
-                # FunctionTool(self.operator_handoff),
-                *mcp_tools,
-            ],
+        section = types.Part.from_text(
+            text=self._prompt.history_section(conversation_history)
         )
+        for idx, content in enumerate(llm_request.contents):
+            if content.role == "user":
+                llm_request.contents[idx] = types.Content(
+                    role=content.role, parts=[section, *(content.parts or [])]
+                )
+                break
+        return None
+
+    @asynccontextmanager
+    async def _turn_session(self, turn: TurnContext):
+        """
+        A throwaway ADK session for one turn. History comes from Postgres
+        through `_inject_history`, so nothing reads session events again and
+        the session is deleted when the turn ends.
+        """
+        session_service = self._runner.session_service
+        session = await session_service.create_session(
+            app_name=self._agent.name,
+            user_id=turn.user_id,
+            session_id=f"{turn.context_id}:{uuid.uuid4().hex}",
+        )
+        try:
+            yield session
+        finally:
+            await session_service.delete_session(
+                app_name=self._agent.name, user_id=turn.user_id, session_id=session.id
+            )
+
+    async def _load_history(self, context_id: str, n: int) -> list[dict]:
+        """Read history from Postgres once queued writes for it are flushed"""
+        await history_writer.barrier(context_id)
+        return await self._conversation_history_manger.fetch_last_n(context_id, n)
+
+    async def _history_seq(self, context_id: str) -> int:
+        """
+        Turns of a conversation, stored or still queued here. The cache
+        falls behind this count once another replica appends.
+        """
+        seq = await self._conversation_history_manger.last_seq(context_id)
+        return seq + history_writer.pending(context_id)
 
     async def operator_handoff(self, summary: str):
         """
@@ -82,79 +246,329 @@ class OrchestratorAgent:
             "next_agent": "finish",
         }
 
-    async def redirect_agent(self, agent_name: str, message: str) -> str:
-        logger.info("Agent Redirected")
-        try:
-            cards = await self._agent_registry.load_cards()
-            token = await self._agent_auth.get_m2m_token(agent_name=agent_name)
-            matched_card = None
-            metadata = {
-                "user_id": self._user_id,
-                "context_id": self._context_id,
-                "role": self._role,
-            }
-
-            for card in cards:
-                if card.name.lower() == agent_name.lower():
-                    matched_card = card
-                elif getattr(card, "id", "").lower() == agent_name.lower():
-                    matched_card = card
-
-            if matched_card is None:
-                return "Agent not found"
+    async def _delegate(self, agent_name: str, message: str) -> str:
+        """Send the message to a registered agent, raising LookupError if unknown"""
+        matched_card = await self._agent_registry.find_card(agent_name)
+        if matched_card is None:
+            raise LookupError(f"Agent {agent_name} not found")
+        token = await self._agent_auth.get_m2m_token(agent_name=agent_name)
+        turn = current_turn()
 
+        if OrchestratorConfig.STREAM_DELEGATION:
+            result = await self._agent_connector.stream_task(
+                matched_card=matched_card,
+                message=message,
+                token=token,
+                metadata=turn.metadata(),
+                updater=turn.updater,
+            )
+        else:
             result = await self._agent_connector.send_task(
                 matched_card=matched_card,
                 message=message,
                 token=token,
-                metadata=metadata,
+                metadata=turn.metadata(),
             )
-            return str(result)
+        return str(result)
 
+    async def redirect_agent(
+        self, agent_name: str, message: str, tool_context: ToolContext
+    ) -> str:
+        logger.info("Agent Redirected")
+        try:
+            result = await self._delegate(agent_name, message)
+        except LookupError:
+            return "Agent not found"
         except Exception as e:
             return f"Error redirecting to agent: {str(e)}"
+        if OrchestratorConfig.SKIP_ECHO_PASS:
+            # The route is decided: the agent's answer is the turn's answer,
+            # no need for the model to read it back
+            tool_context.actions.skip_summarization = True
+        return result
 
-    async def invoke(self, query: str, context_id: str) -> AsyncIterable[dict]:
+    async def fan_out_agents(
+        self,
+        agent_names: list[str],
+        message: str,
+        merge: str,
+        tool_context: ToolContext,
+    ) -> str:
+        """
+        Send the message to several agents at once.
+
+        Args:
+            agent_names: Agents to delegate to, most important first
+            message: The message every agent receives
+            merge: "all" combines every answer, "first" keeps the fastest,
+                "priority" keeps the first listed agent that answers
+        """
+        agent_names = agent_names[: DelegationConfig.FAN_OUT_MAX_AGENTS]
+        logger.info(f"Fanning out to {agent_names}, merge={merge}")
+        metrics.incr("delegation.fan_out.calls")
         try:
-            payload: dict[str, str] = json.loads(query)
-            self._user_id = payload.get("user")
-            self._context_id = context_id
-            self._role = payload.get("role")
-            user_query = payload.get("msg")
-        except (json.JSONDecodeError, AttributeError):
-            self._user_id = None
-            self._context_id = context_id
-        await self._initialize()
-        session = await self._runner.session_service.get_session(
-            app_name=self._agent.name,
-            session_id=self._context_id,
-            user_id=self._user_id,
+            replies = await fan_out(
+                agent_names,
+                lambda agent_name: self._delegate(agent_name, message),
+                merge=merge,
+                deadline=DelegationConfig.FAN_OUT_TIMEOUT,
+            )
+        except ValueError as e:
+            return f"Error redirecting to agents: {str(e)}"
+        answered = [reply for reply in replies if reply.ok]
+        if not answered:
+            return "Error redirecting to agents: " + "; ".join(
+                f"{reply.agent_name}: {reply.error}" for reply in replies
+            )
+        if OrchestratorConfig.SKIP_ECHO_PASS:
+            tool_context.actions.skip_summarization = True
+        if len(replies) == 1:
+            return replies[0].response
+        return compact_json(
+            {
+                "agent": "orchestrator_agent",
+                "response": "\n\n".join(
+                    f"{reply.agent_name}: {self._response_text(reply.response)}"
+                    for reply in answered
+                ),
+                "failed_agents": {
+                    reply.agent_name: reply.error for reply in replies if not reply.ok
+                },
+            }
         )
 
-        if not session:
-            session = await self._runner.session_service.create_session(
-                app_name=self._agent.name,
-                session_id=self._context_id,
-                user_id=self._user_id,
+    @staticmethod
+    def _response_text(response: str) -> str:
+        """The `response` field of a sub-agent's JSON answer, or the answer as is"""
+        try:
+            parsed = json.loads(response)
+        except (json.JSONDecodeError, TypeError):
+            return response
+        if isinstance(parsed, dict) and "response" in parsed:
+            return str(parsed["response"])
+        return response
+
+    async def _handoff(self, summary: str) -> str:
+        """
+        Trigger the operator handoff, through the MCP tool when it is
+        registered, and return its answer as text. Raises if the handoff
+        call fails or the tool reports an error.
+        """
+        for toolset in self._mcp_tools:
+            for tool in await toolset.get_tools():
+                if tool.name == OPERATOR_HANDOFF:
+                    result = await within_deadline(
+                        tool.run_async(args={"summary": summary}, tool_context=None),
+                        DeadlineConfig.MCP_TIMEOUT,
+                    )
+                    if result.isError:
+                        raise RuntimeError(
+                            f"{OPERATOR_HANDOFF} failed: {self._tool_text(result)}"
+                        )
+                    return self._tool_text(result)
+        return json.dumps(await self.operator_handoff(summary))
+
+    @staticmethod
+    def _tool_text(result: CallToolResult) -> str:
+        """The text content of an MCP tool result; other content as JSON"""
+        return "\n".join(
+            (
+                item.text
+                if isinstance(item, TextContent)
+                else compact_json(item.model_dump(mode="json"))
             )
+            for item in result.content
+        )
 
-        user_content = types.Content(
-            role=self._role, parts=[types.Part.from_text(text=user_query)]
+    async def _fast_path_decision(self, turn: TurnContext) -> Optional[RouteDecision]:
+        """Apply the deterministic routing rules to the latest history"""
+        if not OrchestratorConfig.FAST_PATH_ENABLED:
+            return None
+        history = await history_cache.get_or_load(
+            turn.context_id, 8, self._load_history, self._history_seq
         )
+        agents = await self._agent_registry.get_agents_list()
+        decision = self._routing_rules.decide(history, agents)
+        if decision is None and OrchestratorConfig.ROUTING_INDEX_ENABLED:
+            decision = await self._classify(turn)
+        metrics.incr("router.fast_path.hits" if decision else "router.fast_path.misses")
+        return decision
+
+    async def _route_match(self, turn: TurnContext) -> Optional[RouteMatch]:
+        """Classify the turn's message once; later callers reuse the match"""
+        if not turn.route_classified:
+            index = await self._agent_registry.get_routing_index()
+            started = time.perf_counter()
+            turn.route_match = index.classify(turn.query)
+            turn.route_classified = True
+            metrics.observe("router.index_us", (time.perf_counter() - started) * 1e6)
+        return turn.route_match
 
-        async for event in self._runner.run_async(
-            user_id=self._user_id, new_message=user_content, session_id=self._context_id
+    async def _classify(self, turn: TurnContext) -> Optional[RouteDecision]:
+        """Route clear-cut messages with the local skill index"""
+        match = await self._route_match(turn)
+        if (
+            match is None
+            or match.confidence < OrchestratorConfig.ROUTING_CONFIDENCE_THRESHOLD
         ):
-            if event.is_final_response():
-                final_response = ""
-                if (
-                    event.content
-                    and event.content.parts
-                    and event.content.parts[-1].text
-                ):
-                    final_response = event.content.parts[-1].text
-
-                if not final_response or not final_response.strip():
-                    raise ValueError("Model returned empty response, cannot parse JSON")
-
-                yield {"is_task_complete": True, "content": final_response}
+            metrics.incr("router.index.misses")
+            return None
+        logger.info(
+            f"Routing index matched {match.agent_name} "
+            f"(confidence {match.confidence:.2f})"
+        )
+        metrics.incr("router.index.hits")
+        return RouteDecision(action="redirect", agent_name=match.agent_name)
+
+    async def _select_tier(self, turn: TurnContext) -> int:
+        """
+        Start ambiguous messages, and messages the routing index has no
+        signal for at all, above the fast tier; emergency-triage messages
+        start on the strongest one.
+        """
+        last_tier = len(OrchestratorConfig.MODEL_TIERS) - 1
+        if last_tier == 0 or not turn.query:
+            return 0
+        index = await self._agent_registry.get_routing_index()
+        match = await self._route_match(turn)
+        if match is None:
+            tier = 1
+        elif index.has_skill(match.agent_name, OrchestratorConfig.TRIAGE_SKILL):
+            tier = last_tier
+        elif match.confidence < OrchestratorConfig.TIER_MIN_CONFIDENCE:
+            tier = 1
+        else:
+            tier = 0
+        metrics.incr(f"llm.tier.start.{tier}")
+        return tier
+
+    async def _run_fast_path(
+        self, decision: RouteDecision, turn: TurnContext
+    ) -> Optional[str]:
+        """
+        Execute a rule decision, returning None to fall back to the LLM.
+        Only a failed call falls back: once the handoff went through, its
+        answer is the turn's answer, so the operator is not paged twice.
+        """
+        try:
+            if decision.action == "handoff":
+                return await self._handoff(decision.summary)
+            return await self._delegate(decision.agent_name, turn.query)
+        except Exception as e:
+            logger.info("Fast path failed, falling back to the LLM: %s", e)
+            metrics.incr("router.fast_path.errors")
+            return None
+
+    @staticmethod
+    def _record_fast_path(started: float):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("router.fast_path_ms", elapsed_ms)
+        llm_path_ms = metrics.quantile("router.llm_path_ms", 0.5)
+        if llm_path_ms is not None:
+            metrics.observe(
+                "router.fast_path.saved_ms", max(0.0, llm_path_ms - elapsed_ms)
+            )
+
+    @staticmethod
+    def _describe_call(name: str, args: dict) -> str:
+        """Progress message shown to the caller while a tool runs"""
+        if name == "redirect_agent" and args.get("agent_name"):
+            return f"Routing to {args['agent_name']}..."
+        if name == "fan_out_agents" and args.get("agent_names"):
+            return f"Routing to {', '.join(args['agent_names'])}..."
+        if name == OPERATOR_HANDOFF:
+            return "Handing off to a human operator..."
+        return f"Running {name}..."
+
+    async def invoke(self, turn: TurnContext) -> AsyncIterable[dict]:
+        """
+        Run one turn through the shared runner.
+
+        Must be iterated inside `turn_scope(turn)`: the instruction provider
+        and tools read the turn from there, which is what lets one agent
+        serve many concurrent turns.
+
+        Yields `{"is_task_complete": False, "updates": ...}` for streamed
+        LLM text and tool progress, then one item with the final content.
+        """
+        await self.initialize()
+        self._refresh_mcp_tools()
+        started = time.perf_counter()
+
+        decision = await self._fast_path_decision(turn)
+        if decision is not None:
+            yield {
+                "is_task_complete": False,
+                "updates": self._describe_call(
+                    (
+                        "redirect_agent"
+                        if decision.action == "redirect"
+                        else OPERATOR_HANDOFF
+                    ),
+                    {"agent_name": decision.agent_name},
+                ),
+            }
+            result = await self._run_fast_path(decision, turn)
+            if result is not None:
+                self._record_fast_path(started)
+                yield {"is_task_complete": True, "content": result}
+                return
+
+        turn.model_tier = await self._select_tier(turn)
+
+        user_content = types.Content(
+            role=turn.role, parts=[types.Part.from_text(text=turn.query)]
+        )
+
+        run_config = RunConfig(
+            streaming_mode=(
+                StreamingMode.SSE
+                if OrchestratorConfig.STREAM_TOKENS
+                else StreamingMode.NONE
+            )
+        )
+        async with self._turn_session(turn) as session:
+            async for event in self._runner.run_async(
+                user_id=turn.user_id,
+                new_message=user_content,
+                session_id=session.id,
+                run_config=run_config,
+            ):
+                if event.partial:
+                    if event.content and event.content.parts:
+                        chunk = "".join(
+                            part.text for part in event.content.parts if part.text
+                        )
+                        if chunk:
+                            yield {"is_task_complete": False, "updates": chunk}
+                    continue
+
+                for call in event.get_function_calls():
+                    yield {
+                        "is_task_complete": False,
+                        "updates": self._describe_call(call.name, call.args or {}),
+                    }
+
+                if event.is_final_response():
+                    final_response = ""
+                    if (
+                        event.content
+                        and event.content.parts
+                        and event.content.parts[-1].text
+                    ):
+                        final_response = event.content.parts[-1].text
+                    for function_response in event.get_function_responses():
+                        # Delegation answered without an echo pass, see redirect_agent
+                        final_response = final_response or str(
+                            (function_response.response or {}).get("result", "")
+                        )
+
+                    if not final_response or not final_response.strip():
+                        raise ValueError(
+                            "Model returned empty response, cannot parse JSON"
+                        )
+
+                    metrics.observe(
+                        "router.llm_path_ms", (time.perf_counter() - started) * 1000
+                    )
+                    yield {"is_task_complete": True, "content": final_response}
@@ -5,13 +5,16 @@ from a2a.server.tasks import TaskUpdater
 from src.agents.OrchestratorAgent.agent import OrchestratorAgent
 from a2a.utils import new_task, new_agent_text_message
 
-from a2a.utils.errors import ServerError
-
-from a2a.types import Task, TaskState, UnsupportedOperationError
+from a2a.types import Task, TaskState
 import json
 import asyncio
-from src.common.db.Postgre import ConversationHistoryManager
+from typing import Dict
+from src.common.config.config import OrchestratorConfig
+from src.common.db.history_writer import history_writer
 from src.common.logger.logger import get_logger
+from src.common.context.deadline import turn_budget
+from src.common.context.turn_context import TurnContext, turn_scope
+from src.common.metrics.metrics import metrics
 
 logger = get_logger("ORCH_AGENT_EXCUTOR")
 
@@ -24,7 +27,9 @@ class OrchestratorAgentExecutor(AgentExecutor):
 
     def __init__(self):
         self.agent = OrchestratorAgent()
-        self.manager = ConversationHistoryManager()
+        self.history_writer = history_writer
+        # A2A task id -> asyncio task running its turn, for cancel()
+        self._running: Dict[str, asyncio.Task] = {}
 
     async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
         """
@@ -36,70 +41,106 @@ class OrchestratorAgentExecutor(AgentExecutor):
         user_id = metadata.get("user_id")
         role = message.role.value if message and message.role else None
         query = context.get_user_input()
-        input_payload = {
-            "user": user_id,
-            "role": role,
-            "msg": query,
-        }
-        input_payload_str = json.dumps(input_payload)
         task = context.current_task
         if not task:
             task = new_task(context.message)
             await event_queue.enqueue_event(task)
         store_payload = {"role": "user", "query": query}
-        await self.manager.store(
+        await self.history_writer.submit(
             conversation_id=task.context_id,
             username=user_id,
-            conversation=str(store_payload),
+            conversation=store_payload,
         )
-        logger.info("Stored question to conversation history")
+        logger.info("Queued question for conversation history")
         updater = TaskUpdater(event_queue, task.id, task.context_id)
+        headers = (
+            context.call_context.state.get("headers") if context.call_context else None
+        )
+        budget = turn_budget(headers, metadata)
+        turn = TurnContext(
+            context_id=task.context_id,
+            user_id=user_id,
+            role=role,
+            query=query,
+            updater=updater,
+            deadline=asyncio.get_running_loop().time() + budget,
+        )
 
+        self._running[task.id] = asyncio.current_task()
         try:
-            async for item in self.agent.invoke(input_payload_str, task.context_id):
-                is_task_complete = item.get("is_task_complete", False)
+            with turn_scope(turn):
+                async with asyncio.timeout_at(turn.deadline):
+                    async for item in self.agent.invoke(turn):
+                        is_task_complete = item.get("is_task_complete", False)
 
-                if not is_task_complete:
-                    message = item.get(
-                        "updates", "The Agent is still working on your request."
-                    )
-                    await updater.update_status(
-                        TaskState.working,
-                        new_agent_text_message(message, task.context_id, task.id),
-                    )
-                else:
-                    logger.info(item)
-                    final_result = item.get("content", "no result received")
-                    logger.info(final_result)
-                    return_response = ""
-                    # return_response = final_result[]
-                    try:
-                        # Unwrap nested JSON if present
-                        parsed = json.loads(final_result)
-                        final_result = (
-                            parsed if isinstance(parsed, dict) else final_result
-                        )
-                        return_response = final_result["response"]
-                    except (json.JSONDecodeError, TypeError):
-                        return_response = final_result
-                        pass
-                    await updater.update_status(
-                        TaskState.completed,
-                        new_agent_text_message(
-                            str(return_response), task.context_id, task.id
-                        ),
-                    )
-                    logger.info(f"Final Rsponse from Orch Agent:{final_result}")
-                    await self.manager.store(
-                        conversation_id=task.context_id,
-                        username=user_id,
-                        conversation=str(final_result),
-                    )
-                    logger.info("Stored response to conversation history")
-                    await asyncio.sleep(0.1)
+                        if not is_task_complete:
+                            message = item.get(
+                                "updates", "The Agent is still working on your request."
+                            )
+                            await updater.update_status(
+                                TaskState.working,
+                                new_agent_text_message(
+                                    message, task.context_id, task.id
+                                ),
+                            )
+                        else:
+                            logger.info(item)
+                            final_result = item.get("content", "no result received")
+                            logger.info(final_result)
+                            return_response = ""
+                            # return_response = final_result[]
+                            try:
+                                # Unwrap nested JSON if present
+                                parsed = json.loads(final_result)
+                                final_result = (
+                                    parsed if isinstance(parsed, dict) else final_result
+                                )
+                                return_response = final_result["response"]
+                            except (json.JSONDecodeError, TypeError):
+                                return_response = final_result
+                                pass
+                            await updater.update_status(
+                                TaskState.completed,
+                                new_agent_text_message(
+                                    str(return_response), task.context_id, task.id
+                                ),
+                            )
+                            logger.info(f"Final Rsponse from Orch Agent:{final_result}")
+                            await self.history_writer.submit(
+                                conversation_id=task.context_id,
+                                username=user_id,
+                                conversation=final_result,
+                            )
+                            logger.info("Queued response for conversation history")
+                            await asyncio.sleep(0.1)
 
-                    break
+                            break
 
+        except asyncio.CancelledError:
+            logger.info(f"Turn for task {task.id} cancelled")
+            metrics.incr("turn.cancelled")
+            # Published on the turn's own queue so streaming callers see it too
+            try:
+                await updater.cancel(
+                    new_agent_text_message(
+                        "The request was canceled", task.context_id, task.id
+                    )
+                )
+            except RuntimeError:
+                # The cancel landed after the task had already finished
+                logger.info(f"Task {task.id} already finished, not marking it canceled")
+            raise
+        except TimeoutError as e:
+            metrics.incr("turn.deadline_exceeded")
+            await updater.update_status(
+                TaskState.failed,
+                new_agent_text_message(
+                    str(e) or f"The request did not complete within {budget:g}s",
+                    task.context_id,
+                    task.id,
+                ),
+            )
+            raise
         except Exception as e:
             error_message = f"An error occurred: {str(e)}"
             await updater.update_status(
@@ -107,8 +148,29 @@ class OrchestratorAgentExecutor(AgentExecutor):
                 new_agent_text_message(error_message, task.context_id, task.id),
             )
             raise
+        finally:
+            self._running.pop(task.id, None)
 
     async def cancel(
         self, request: RequestContext, event_queue: EventQueue
     ) -> Task | None:
-        raise ServerError(error=UnsupportedOperationError())
+        """
+        Stop the task's turn wherever it is (LLM call, sub-agent or MCP
+        call) and mark the task canceled. Sub-agents that were streaming
+        for the turn are asked to cancel their own task.
+        """
+        running = self._running.pop(request.task_id, None)
+        if running is not None and not running.done():
+            running.cancel()
+            # Let the turn unwind so its clean-up runs before we answer
+            await asyncio.wait({running}, timeout=OrchestratorConfig.CANCEL_GRACE)
+            if running.done():
+                # The turn published the canceled state itself
+                return None
+        updater = TaskUpdater(event_queue, request.task_id, request.context_id)
+        await updater.cancel(
+            new_agent_text_message(
+                "The request was canceled", request.context_id, request.task_id
+            )
+        )
+        return None
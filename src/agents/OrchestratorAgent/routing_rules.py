@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+from typing import Optional
+from src.common.db.turns import unwrap_turn
+
+OPERATOR_HANDOFF = "operator_handoff"
+MAX_SUMMARY_MESSAGES = 3
+
+
+@dataclass
+class RouteDecision:
+    """A routing decision taken without asking the LLM"""
+
+    action: str  # "redirect" or "handoff"
+    agent_name: Optional[str] = None
+    summary: Optional[str] = None
+
+
+class RoutingRules:
+    """
+    Deterministic routing rules evaluated before the LLM.
+
+    Mirrors rule 1 of the orchestrator prompt: when the most recent agent
+    response names a `next_agent`, the turn goes there. A registered agent
+    is delegated to directly and `operator_handoff` triggers the handoff;
+    anything else (`finish`, the orchestrator itself, unknown names) is left
+    to the LLM.
+    """
+
+    def decide(self, history: list, agents: list[str]) -> Optional[RouteDecision]:
+        turns = [unwrap_turn(turn) for turn in history]
+        last_agent_turn = next(
+            (turn for turn in reversed(turns) if turn.get("role") != "user"), None
+        )
+        if not last_agent_turn:
+            return None
+        next_agent = last_agent_turn.get("next_agent")
+        if not isinstance(next_agent, str) or not next_agent.strip():
+            return None
+
+        if next_agent.strip().lower() == OPERATOR_HANDOFF:
+            return RouteDecision(action="handoff", summary=self._summary(turns))
+        for agent in agents:
+            if agent.lower() == next_agent.strip().lower():
+                return RouteDecision(action="redirect", agent_name=agent)
+        return None
+
+    @staticmethod
+    def _summary(turns: list[dict]) -> str:
+        """Short situation summary for the operator built from recent turns"""
+        messages = [
+            str(turn["query"])
+            for turn in turns
+            if turn.get("role") == "user" and turn.get("query")
+        ][-MAX_SUMMARY_MESSAGES:]
+        last_response = next(
+            (turn.get("response") for turn in reversed(turns) if turn.get("response")),
+            None,
+        )
+        summary = "Caller said: " + " | ".join(messages) if messages else ""
+        if last_response:
+            summary += f". Last agent response: {last_response}"
+        return summary or "Operator handoff requested by agent"
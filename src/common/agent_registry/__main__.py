@@ -0,0 +1,61 @@
+import argparse
+import asyncio
+import json
+import sys
+from a2a.types import AgentCard
+from src.common.agent_registry.agent_registry import AgentRegistry
+from src.common.agent_registry.routing_index import (
+    RoutingIndex,
+    evaluate,
+    labelled_queries,
+)
+from src.common.config.config import OrchestratorConfig
+
+
+def read_rows(path: str):
+    source = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+async def load_cards(path: str | None) -> list[AgentCard]:
+    if path is None:
+        return await AgentRegistry().load_cards()
+    with open(path, encoding="utf-8") as f:
+        return [AgentCard.model_validate(card) for card in json.load(f)]
+
+
+async def run(args: argparse.Namespace):
+    index = RoutingIndex.build(await load_cards(args.cards))
+    samples = list(labelled_queries(read_rows(args.input)))
+    for threshold in args.threshold:
+        print(json.dumps(evaluate(index, samples, threshold)))
+
+
+def main():
+    """
+    Evaluate the local routing index against history exported with
+    `python -m src.common.db export --format ndjson`.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.common.agent_registry")
+    parser.add_argument("--input", default="-", help="NDJSON export, - for stdin")
+    parser.add_argument(
+        "--cards",
+        help="JSON file with a list of agent cards, defaults to the live registry",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        nargs="+",
+        default=[OrchestratorConfig.ROUTING_CONFIDENCE_THRESHOLD],
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
-from typing import Any
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Any, Optional
 from uuid import uuid4
-from a2a.types import SendMessageRequest, MessageSendParams
+from a2a.server.tasks import TaskUpdater
+from a2a.types import (
+    CancelTaskRequest,
+    JSONRPCErrorResponse,
+    Message,
+    MessageSendParams,
+    SendMessageRequest,
+    SendStreamingMessageRequest,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskIdParams,
+    TaskStatusUpdateEvent,
+)
+from a2a.utils import get_text_parts, new_agent_text_message
 import httpx
 from a2a.client import A2AClient
+from src.common.agent_registry.agent_health import agent_health
+from src.common.config.config import DelegationConfig
+from src.common.context.deadline import time_left
+from src.common.context.turn_context import DEADLINE_METADATA_KEY
 from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
 import json
 
 logger = get_logger("Agent Router")
@@ -15,7 +37,100 @@ class AgentConnector:
     """
 
     def __init__(self):
-        pass
+        # agent name -> (card url, pooled httpx client, A2A client)
+        self._clients: dict[str, tuple[str, httpx.AsyncClient, A2AClient]] = {}
+        # In-flight cancel requests for sub-agent tasks we stopped waiting on
+        self._remote_cancels: set[asyncio.Task] = set()
+
+    @staticmethod
+    def _new_http_client(agent_name: str) -> httpx.AsyncClient:
+        """Keep-alive client sized by DELEGATION_CLIENTS[agent_name] or defaults"""
+        settings = DelegationConfig.client_settings(agent_name)
+        http2 = settings["http2"]
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                f"HTTP/2 requested for {agent_name} but h2 is not installed "
+                "(pip install httpx[http2]), using HTTP/1.1"
+            )
+            http2 = False
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings["max_connections"],
+                max_keepalive_connections=settings["max_keepalive_connections"],
+                keepalive_expiry=settings["keepalive_expiry"],
+            ),
+            timeout=httpx.Timeout(
+                settings["timeout"], connect=settings["connect_timeout"]
+            ),
+        )
+
+    def _client_for(self, matched_card) -> A2AClient:
+        cached = self._clients.get(matched_card.name)
+        if cached is not None and cached[0] == matched_card.url:
+            return cached[2]
+        http_client = cached[1] if cached else self._new_http_client(matched_card.name)
+        a2a_client = A2AClient(httpx_client=http_client, agent_card=matched_card)
+        self._clients[matched_card.name] = (matched_card.url, http_client, a2a_client)
+        return a2a_client
+
+    async def close(self):
+        """Close every pooled connection"""
+        if self._remote_cancels:
+            await asyncio.gather(*self._remote_cancels, return_exceptions=True)
+        clients, self._clients = self._clients, {}
+        for _, http_client, _ in clients.values():
+            await http_client.aclose()
+
+    @asynccontextmanager
+    async def _tracked_call(self, agent_name: str):
+        """
+        Bound a call to the agent by what is left of the turn and record its
+        outcome with the agent's circuit breaker. Yields the call's budget.
+        """
+        timeout = time_left(DelegationConfig.CALL_TIMEOUT)
+        agent_health.before_call(agent_name)
+        try:
+            async with asyncio.timeout(timeout):
+                yield timeout
+        except asyncio.CancelledError:
+            agent_health.abandon_call(agent_name)
+            raise
+        except TimeoutError as e:
+            if timeout is not None and timeout < DelegationConfig.CALL_TIMEOUT:
+                # The turn ran out of time, not the agent
+                agent_health.abandon_call(agent_name)
+            else:
+                agent_health.record_failure(agent_name, e)
+            raise
+        except Exception as e:
+            agent_health.record_failure(agent_name, e)
+            raise
+        agent_health.record_success(agent_name)
+
+    @staticmethod
+    def _send_params(
+        message: str, metadata: dict, timeout: Optional[float] = None
+    ) -> MessageSendParams:
+        message_metadata = {"user_id": metadata["user_id"]}
+        if timeout is not None:
+            # Relative, so the sub-agent's clock does not need to agree
+            message_metadata[DEADLINE_METADATA_KEY] = round(timeout, 3)
+        send_message_payload: dict[str, Any] = {
+            "message": {
+                "role": metadata["role"],
+                "messageId": str(uuid4()),
+                "parts": [
+                    {
+                        "text": (message),
+                        "kind": "text",
+                    }
+                ],
+                "metadata": message_metadata,
+                "context_id": metadata["context_id"],
+            }
+        }
+        return MessageSendParams(**send_message_payload)
 
     async def send_task(
         self, matched_card, message: str, token: str, metadata: dict
@@ -34,42 +149,137 @@ class AgentConnector:
         logger.info(
             f"message:{message},mathchedcard:{matched_card},metadata:{metadata}"
         )
-        async with httpx.AsyncClient(
-            headers={"Authorization": f"Bearer {token}"}, timeout=300.0
-        ) as httpx_client:
-            a2a_client = A2AClient(
-                httpx_client=httpx_client,
-                agent_card=matched_card,
-            )
-            send_message_payload: dict[str, Any] = {
-                "message": {
-                    "role": metadata["role"],
-                    "messageId": str(uuid4()),
-                    "parts": [
-                        {
-                            "text": (message),
-                            "kind": "text",
-                        }
-                    ],
-                    "metadata": {"user_id": metadata["user_id"]},
-                    "context_id": metadata["context_id"],
-                }
-            }
-
+        a2a_client = self._client_for(matched_card)
+        async with self._tracked_call(matched_card.name) as timeout:
             request = SendMessageRequest(
-                id=str(uuid4()), params=MessageSendParams(**send_message_payload)
+                id=str(uuid4()), params=self._send_params(message, metadata, timeout)
             )
             logger.info("Request sennt to subagent")
-            response = await a2a_client.send_message(request=request)
-            logger.info(f"Response recieved from subagent:{response}")
-            response_data = response.model_dump(mode="json", exclude_none=True)
+            # The token is per request: pooled clients are shared across turns
+            response = await a2a_client.send_message(
+                request=request,
+                http_kwargs={"headers": {"Authorization": f"Bearer {token}"}},
+            )
+        logger.info(f"Response recieved from subagent:{response}")
+        response_data = response.model_dump(mode="json", exclude_none=True)
+
+        try:
+            agent_response = response_data["result"]["status"]["message"]["parts"][0][
+                "text"
+            ]
 
+        except (KeyError, IndexError):
+            agent_response = "No response from agent"
+
+        return agent_response
+
+    async def stream_task(
+        self,
+        matched_card,
+        message: str,
+        token: str,
+        metadata: dict,
+        updater: Optional[TaskUpdater] = None,
+    ) -> str:
+        """
+        Like send_task, but over message/stream: the agent's working status
+        messages and artifacts are relayed to `updater` as they arrive.
+        Agents whose card does not advertise streaming get send_task.
+
+        Returns:
+            str: The agent's final status message, or its artifacts' text
+        """
+        capabilities = matched_card.capabilities
+        if not (capabilities and capabilities.streaming):
+            return await self.send_task(matched_card, message, token, metadata)
+        a2a_client = self._client_for(matched_card)
+        final_text = ""
+        artifact_text: list[str] = []
+        remote_task_id: Optional[str] = None
+        try:
+            async with self._tracked_call(matched_card.name) as timeout:
+                request = SendStreamingMessageRequest(
+                    id=str(uuid4()),
+                    params=self._send_params(message, metadata, timeout),
+                )
+                async for response in a2a_client.send_message_streaming(
+                    request=request,
+                    http_kwargs={"headers": {"Authorization": f"Bearer {token}"}},
+                ):
+                    if isinstance(response.root, JSONRPCErrorResponse):
+                        raise RuntimeError(response.root.error.message)
+                    event = response.root.result
+                    if isinstance(event, Task):
+                        remote_task_id = event.id
+                    elif event.task_id:
+                        remote_task_id = event.task_id
+                    if isinstance(event, TaskStatusUpdateEvent):
+                        text = self._message_text(event.status.message)
+                        if not text:
+                            continue
+                        if event.status.state == TaskState.working and not event.final:
+                            await self._relay_status(updater, text)
+                        else:
+                            final_text = text
+                    elif isinstance(event, TaskArtifactUpdateEvent):
+                        artifact_text.extend(get_text_parts(event.artifact.parts))
+                        if updater is not None:
+                            await updater.add_artifact(
+                                parts=event.artifact.parts,
+                                artifact_id=event.artifact.artifact_id,
+                                name=event.artifact.name,
+                                append=event.append,
+                                last_chunk=event.last_chunk,
+                            )
+                    elif isinstance(event, Message):
+                        final_text = self._message_text(event)
+                    elif isinstance(event, Task):
+                        final_text = (
+                            self._message_text(event.status.message) or final_text
+                        )
+        except (asyncio.CancelledError, TimeoutError):
+            # The sub-agent would otherwise keep working for nobody
+            if remote_task_id is not None:
+                self._cancel_remote(matched_card, remote_task_id, token)
+            raise
+        logger.info(f"Streamed response recieved from subagent:{final_text}")
+        return final_text or "".join(artifact_text) or "No response from agent"
+
+    def _cancel_remote(self, matched_card, task_id: str, token: str):
+        """Ask the agent to cancel its task, without waiting for the answer"""
+
+        async def cancel():
+            request = CancelTaskRequest(
+                id=str(uuid4()), params=TaskIdParams(id=task_id)
+            )
             try:
-                agent_response = response_data["result"]["status"]["message"]["parts"][
-                    0
-                ]["text"]
+                async with asyncio.timeout(DelegationConfig.CANCEL_TIMEOUT):
+                    await self._client_for(matched_card).cancel_task(
+                        request=request,
+                        http_kwargs={"headers": {"Authorization": f"Bearer {token}"}},
+                    )
+                metrics.incr("delegation.remote_cancels")
+            except Exception as e:
+                logger.warning(
+                    f"Cancelling task {task_id} on {matched_card.name} failed: {e}"
+                )
+
+        task = asyncio.create_task(cancel())
+        self._remote_cancels.add(task)
+        task.add_done_callback(self._remote_cancels.discard)
+
+    @staticmethod
+    def _message_text(message: Optional[Message]) -> str:
+        return "".join(get_text_parts(message.parts)) if message else ""
+
+    @staticmethod
+    async def _relay_status(updater: Optional[TaskUpdater], text: str):
+        if updater is None:
+            return
+        await updater.update_status(
+            TaskState.working,
+            new_agent_text_message(text, updater.context_id, updater.task_id),
+        )
 
-            except (KeyError, IndexError):
-                agent_response = "No response from agent"
 
-            return agent_response
+agent_connector = AgentConnector()
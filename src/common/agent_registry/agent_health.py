@@ -0,0 +1,152 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+import httpx
+from src.common.config.config import DelegationConfig
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("AgentHealth")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an agent whose circuit is open"""
+
+
+@dataclass
+class _AgentState:
+    state: str = CLOSED
+    consecutive_failures: int = 0
+    opened_at: float = 0.0
+    trial_in_flight: bool = False
+    last_error: Optional[str] = None
+
+
+class AgentHealthMonitor:
+    """
+    Per-agent health and circuit breakers for delegation.
+
+    Health is passive (the outcome of every delegated call) and active
+    (periodic requests to each agent's card endpoint). After
+    `failure_threshold` consecutive failures an agent's circuit opens and
+    calls to it fail immediately for `open_seconds`; then a single trial
+    call is let through and its outcome closes or re-opens the circuit. A
+    successful probe of an open agent allows that trial early.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = DelegationConfig.BREAKER_FAILURE_THRESHOLD,
+        open_seconds: float = DelegationConfig.BREAKER_OPEN_SECONDS,
+        probe_interval: float = DelegationConfig.PROBE_INTERVAL,
+        probe_timeout: float = DelegationConfig.PROBE_TIMEOUT,
+    ):
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self._agents: Dict[str, _AgentState] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _get(self, agent_name: str) -> _AgentState:
+        return self._agents.setdefault(agent_name.lower(), _AgentState())
+
+    def _set_state(self, agent_name: str, agent: _AgentState, state: str):
+        if agent.state != state:
+            logger.info(f"Circuit for {agent_name}: {agent.state} -> {state}")
+        agent.state = state
+        metrics.set_gauge(f"agent_health.{agent_name}.open", int(state == OPEN))
+
+    def is_available(self, agent_name: str) -> bool:
+        """False while the agent's circuit is open"""
+        agent = self._agents.get(agent_name.lower())
+        if agent is None or agent.state != OPEN:
+            return True
+        return time.monotonic() - agent.opened_at >= self.open_seconds
+
+    def before_call(self, agent_name: str):
+        """Raise CircuitOpenError if the agent must not be called right now"""
+        agent = self._get(agent_name)
+        if agent.state == OPEN:
+            if time.monotonic() - agent.opened_at < self.open_seconds:
+                metrics.incr("agent_health.rejected")
+                raise CircuitOpenError(
+                    f"Agent {agent_name} is unavailable: {agent.last_error}"
+                )
+            self._set_state(agent_name, agent, HALF_OPEN)
+        if agent.state == HALF_OPEN:
+            if agent.trial_in_flight:
+                metrics.incr("agent_health.rejected")
+                raise CircuitOpenError(f"Agent {agent_name} is being retried")
+            agent.trial_in_flight = True
+
+    def record_success(self, agent_name: str):
+        agent = self._get(agent_name)
+        agent.consecutive_failures = 0
+        agent.trial_in_flight = False
+        agent.last_error = None
+        self._set_state(agent_name, agent, CLOSED)
+
+    def abandon_call(self, agent_name: str):
+        """A call was cancelled before it had an outcome"""
+        self._get(agent_name).trial_in_flight = False
+
+    def record_failure(self, agent_name: str, error: BaseException | str):
+        agent = self._get(agent_name)
+        agent.consecutive_failures += 1
+        agent.trial_in_flight = False
+        agent.last_error = str(error) or type(error).__name__
+        metrics.incr(f"agent_health.{agent_name}.failures")
+        if (
+            agent.state == HALF_OPEN
+            or agent.consecutive_failures >= self.failure_threshold
+        ):
+            agent.opened_at = time.monotonic()
+            self._set_state(agent_name, agent, OPEN)
+
+    async def start(self, targets: Callable[[], Dict[str, str]]):
+        """Probe the URLs returned by `targets` ({agent name: url}) periodically"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(targets))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, targets: Callable[[], Dict[str, str]]):
+        async with httpx.AsyncClient(timeout=self.probe_timeout) as client:
+            while True:
+                await asyncio.sleep(self.probe_interval)
+                await asyncio.gather(
+                    *(self._probe(client, name, url) for name, url in targets().items())
+                )
+
+    async def _probe(self, client: httpx.AsyncClient, agent_name: str, url: str):
+        try:
+            response = await client.get(url)
+            healthy = response.status_code < 500
+            error = f"card endpoint returned {response.status_code}"
+        except httpx.HTTPError as e:
+            healthy = False
+            error = f"card endpoint unreachable: {e!r}"
+        metrics.incr(f"agent_health.probes.{'ok' if healthy else 'failed'}")
+        agent = self._get(agent_name)
+        if not healthy:
+            self.record_failure(agent_name, error)
+        elif agent.state == OPEN:
+            # Reachable again: let the next delegation through as the trial
+            self._set_state(agent_name, agent, HALF_OPEN)
+
+
+agent_health = AgentHealthMonitor()
@@ -1,19 +1,57 @@
 import json
 import os
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Optional
 from a2a.types import AgentCard
-from a2a.client import A2ACardResolver
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
 import httpx
-import json
+from src.common.agent_registry.routing_index import RoutingIndex
+from src.common.config.config import AgentRegistryConfig
+from src.common.context.deadline import retry
 from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
 
 logger = get_logger("agent_registry")
 
 
+@dataclass
+class _CachedCard:
+    card: AgentCard
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+@dataclass
+class _Snapshot:
+    """View of the registry, replaced as a whole when the cards change"""
+
+    cards: list[AgentCard] = field(default_factory=list)
+    by_name: Dict[str, AgentCard] = field(default_factory=dict)
+    context_cards: list[dict] = field(default_factory=list)
+    routing_index: RoutingIndex = field(default_factory=lambda: RoutingIndex.build([]))
+    loaded_at: float = 0.0
+
+
 class AgentRegistry:
-    """Agent registry to load agent cards from URLs"""
+    """
+    Agent registry to load agent cards from URLs.
 
-    def __init__(self):
-        self._agent_cards = None
+    Cards are cached in a snapshot shared by every reader and refreshed in
+    the background every `AGENT_REGISTRY_TTL` seconds with conditional
+    requests, so unchanged cards cost a 304. A refresh builds a complete new
+    snapshot before swapping it in: readers never wait on the network once
+    the first load is done.
+    """
+
+    def __init__(self, refresh_interval: float = AgentRegistryConfig.REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[_Snapshot] = None
+        self._validators: Dict[str, _CachedCard] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._task: Optional[asyncio.Task] = None
 
     async def load_cards(self, file_path: str = None) -> list[AgentCard]:
         """
@@ -31,30 +69,155 @@ class AgentRegistry:
         except json.JSONDecodeError:
             return []
 
-        cards = []
-        async with httpx.AsyncClient(timeout=300.0) as client:
-            for base_url in base_urls:
-                resolver = A2ACardResolver(
-                    base_url=base_url.rstrip("/"), httpx_client=client
+        async with httpx.AsyncClient(
+            timeout=AgentRegistryConfig.FETCH_TIMEOUT
+        ) as client:
+            results = await asyncio.gather(
+                *(self._resolve(client, base_url.rstrip("/")) for base_url in base_urls)
+            )
+        return [card for card in results if card is not None]
+
+    async def _resolve(
+        self, client: httpx.AsyncClient, base_url: str
+    ) -> Optional[AgentCard]:
+        """
+        Fetch one card within its own timeout. A failing agent keeps its last
+        known good card, or is left out if it never answered.
+        """
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(AgentRegistryConfig.FETCH_TIMEOUT):
+                card = await retry(
+                    lambda: self._fetch_card(client, base_url),
+                    "agent_registry.fetch",
+                    retry_on=(httpx.TransportError,),
                 )
-                card = await resolver.get_agent_card()
-                cards.append(card)
-        return cards
+        except Exception as e:
+            metrics.incr(f"agent_registry.fetch_errors.{base_url}")
+            cached = self._validators.get(base_url)
+            logger.warning(
+                f"Agent card fetch from {base_url} failed ({e!r}), "
+                + ("keeping last known card" if cached else "skipping agent")
+            )
+            return cached.card if cached else None
+        finally:
+            metrics.observe(
+                f"agent_registry.fetch_ms.{base_url}",
+                (time.perf_counter() - started) * 1000,
+            )
+        return card
+
+    async def _fetch_card(self, client: httpx.AsyncClient, base_url: str) -> AgentCard:
+        """GET the agent card, revalidating the cached copy when there is one"""
+        cached = self._validators.get(base_url)
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        response = await client.get(
+            f"{base_url}{AGENT_CARD_WELL_KNOWN_PATH}", headers=headers
+        )
+        if response.status_code == 304 and cached:
+            metrics.incr("agent_registry.not_modified")
+            return cached.card
+        response.raise_for_status()
+        card = AgentCard.model_validate(response.json())
+        self._validators[base_url] = _CachedCard(
+            card=card,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        metrics.incr("agent_registry.fetched")
+        return card
+
+    async def refresh(self) -> bool:
+        """Reload every card and swap in a new snapshot; keep the old one on error"""
+        async with self._refresh_lock:
+            try:
+                cards = await self.load_cards()
+            except Exception as e:
+                logger.warning(f"Agent registry refresh failed: {e}")
+                metrics.incr("agent_registry.refresh_errors")
+                return False
+            if self._snapshot is not None and cards == self._snapshot.cards:
+                self._snapshot.loaded_at = time.monotonic()
+                return True
+            by_name = {}
+            for card in cards:
+                by_name[card.name.lower()] = card
+                card_id = getattr(card, "id", None)
+                if card_id:
+                    by_name.setdefault(card_id.lower(), card)
+            self._snapshot = _Snapshot(
+                cards=cards,
+                by_name=by_name,
+                context_cards=await self.simplify_cards(cards),
+                routing_index=RoutingIndex.build(cards),
+                loaded_at=time.monotonic(),
+            )
+            logger.info(f"Agent registry loaded {[card.name for card in cards]}")
+            return True
+
+    async def _current(self) -> _Snapshot:
+        """The live snapshot; only the very first call waits for a load"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            await self.refresh()
+            return self._snapshot or _Snapshot()
+        stale = time.monotonic() - snapshot.loaded_at > self.refresh_interval
+        if stale and self._task is None and not self._refresh_lock.locked():
+            # No background refresher (e.g. CLI use): refresh without waiting
+            self._refresh_task = asyncio.create_task(self.refresh())
+        return snapshot
+
+    async def start(self):
+        """Load the cards and keep them fresh in the background"""
+        if self._task is not None:
+            return
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    def card_urls(self) -> Dict[str, str]:
+        """Card endpoint of every agent seen so far, for health probes"""
+        return {
+            cached.card.name: f"{base_url}{AGENT_CARD_WELL_KNOWN_PATH}"
+            for base_url, cached in self._validators.items()
+        }
+
+    async def find_card(self, agent_name: str) -> Optional[AgentCard]:
+        """Card by agent name or id, from memory"""
+        snapshot = await self._current()
+        return snapshot.by_name.get(agent_name.lower())
 
     async def get_context_cards(self) -> list[dict]:
-        if self._agent_cards is None:
-            self._agent_cards = await self.load_cards()
-        return await self.simplify_cards(self._agent_cards)
+        return (await self._current()).context_cards
 
     async def get_agents_list(self) -> list[str]:
-        if self._agent_cards is None:
-            self._agent_cards = await self.load_cards()
-        return [card.name for card in self._agent_cards]
+        return [card.name for card in (await self._current()).cards]
+
+    async def get_routing_index(self) -> RoutingIndex:
+        """Local skill index over the loaded cards, built once per card set"""
+        return (await self._current()).routing_index
 
     async def simplify_cards(self, cards: list[AgentCard]) -> list[dict]:
         """Extract only essential info for LLM selection"""
-        if self._agent_cards is None:
-            self._agent_cards = await self.load_cards()
         return [
             {
                 "name": card.name,
@@ -67,3 +230,6 @@ class AgentRegistry:
             }
             for card in cards
         ]
+
+
+agent_registry = AgentRegistry()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("FanOut")
+
+FIRST = "first"
+ALL = "all"
+PRIORITY = "priority"
+MERGE_MODES = (FIRST, ALL, PRIORITY)
+
+
+@dataclass
+class AgentReply:
+    agent_name: str
+    response: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+async def fan_out(
+    agent_names: List[str],
+    call: Callable[[str], Awaitable[str]],
+    merge: str = ALL,
+    deadline: float = 30.0,
+) -> List[AgentReply]:
+    """
+    Run `call(agent_name)` for every agent concurrently, each bounded by
+    `deadline` seconds, and return the replies that make up the answer.
+
+    - first: the first successful reply
+    - all: every reply, in `agent_names` order, failures included
+    - priority: the successful reply earliest in `agent_names`; it is known
+      as soon as every agent listed before it has failed
+
+    Calls that can no longer change the answer are cancelled. When no call
+    succeeds, first and priority return every failure. Raises ValueError
+    for an unknown merge mode or an empty `agent_names`.
+    """
+    if merge not in MERGE_MODES:
+        raise ValueError(f"Unknown merge mode {merge!r}, expected one of {MERGE_MODES}")
+    if not agent_names:
+        raise ValueError("At least one agent name is required")
+    started = time.perf_counter()
+
+    async def bounded(agent_name: str) -> AgentReply:
+        try:
+            async with asyncio.timeout(deadline):
+                return AgentReply(agent_name, response=await call(agent_name))
+        except TimeoutError:
+            metrics.incr("delegation.fan_out.timeouts")
+            return AgentReply(agent_name, error=f"no answer within {deadline}s")
+        except Exception as e:
+            return AgentReply(agent_name, error=str(e) or type(e).__name__)
+
+    names = list(dict.fromkeys(agent_names))
+    tasks = {asyncio.create_task(bounded(name)): name for name in names}
+    replies: dict[str, AgentReply] = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                replies[tasks[task]] = task.result()
+            winner = _winner(names, replies, merge)
+            if winner is not None:
+                return [winner]
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.incr("delegation.fan_out.cancelled", len(pending))
+            await asyncio.gather(*pending, return_exceptions=True)
+        metrics.observe("delegation.fan_out_ms", (time.perf_counter() - started) * 1000)
+    return [replies[name] for name in names]
+
+
+def _winner(
+    names: List[str], replies: dict[str, AgentReply], merge: str
+) -> Optional[AgentReply]:
+    """The reply that settles the answer early, if there is one yet"""
+    if merge == FIRST:
+        return next((reply for reply in replies.values() if reply.ok), None)
+    if merge == PRIORITY:
+        for name in names:
+            reply = replies.get(name)
+            if reply is None:
+                return None
+            if reply.ok:
+                return reply
+    return None
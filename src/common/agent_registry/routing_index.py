@@ -0,0 +1,174 @@
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from a2a.types import AgentCard
+from src.common.db.turns import unwrap_turn
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its my of on "
+    "or our please that the there this to was we were what when where which "
+    "who will with you your".split()
+)
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def _stem(token: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        _stem(token)
+        for token in TOKEN_RE.findall((text or "").lower())
+        if token not in STOPWORDS
+    ]
+
+
+def card_document(card: AgentCard) -> List[str]:
+    """Terms describing an agent: description, skill text, tags and examples"""
+    tokens = tokenize(card.description)
+    for skill in card.skills or []:
+        tokens += tokenize(skill.name) + tokenize(skill.description)
+        for example in skill.examples or []:
+            tokens += tokenize(example)
+        # Tags are the most specific signal a card has, count them twice
+        for tag in skill.tags or []:
+            tokens += tokenize(tag) * 2
+    return tokens
+
+
+@dataclass
+class RouteMatch:
+    agent_name: str
+    score: float
+    # 0..1, see RoutingIndex
+    confidence: float
+
+
+class RoutingIndex:
+    """
+    BM25 index with one document per agent card.
+
+    Term weights are computed once when the index is built, so classifying
+    a message is a tokenize plus a sum over the postings of its terms.
+    Confidence is the best agent's margin over the runner-up, damped for
+    low absolute scores: a message that matches several agents equally, or
+    one agent through a single weak term, stays well below 1.
+    """
+
+    def __init__(
+        self,
+        agents: List[str],
+        postings: Dict[str, List[Tuple[int, float]]],
+        skills: Optional[Dict[str, Set[str]]] = None,
+    ):
+        self.agents = agents
+        self._postings = postings
+        # Lowercased skill ids and tags per agent
+        self._skills = skills or {}
+
+    @classmethod
+    def build(cls, cards: List[AgentCard]) -> "RoutingIndex":
+        documents = [Counter(card_document(card)) for card in cards]
+        lengths = [sum(doc.values()) for doc in documents]
+        avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+        doc_freq = Counter(term for doc in documents for term in doc)
+
+        postings: Dict[str, List[Tuple[int, float]]] = {}
+        for idx, doc in enumerate(documents):
+            norm = K1 * (1 - B + B * lengths[idx] / avg_length) if avg_length else K1
+            for term, tf in doc.items():
+                df = doc_freq[term]
+                idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+                weight = idf * tf * (K1 + 1) / (tf + norm)
+                postings.setdefault(term, []).append((idx, weight))
+        skills = {
+            card.name: {
+                label.lower()
+                for skill in card.skills or []
+                for label in [skill.id, *(skill.tags or [])]
+            }
+            for card in cards
+        }
+        return cls([card.name for card in cards], postings, skills)
+
+    def has_skill(self, agent_name: str, skill: str) -> bool:
+        """Whether the agent's card lists `skill` as a skill id or tag"""
+        return skill.lower() in self._skills.get(agent_name, ())
+
+    def classify(self, message: str) -> Optional[RouteMatch]:
+        """Best matching agent for the message, or None if no term matches"""
+        scores = [0.0] * len(self.agents)
+        for term in set(tokenize(message)):
+            for idx, weight in self._postings.get(term, ()):
+                scores[idx] += weight
+        if not scores:
+            return None
+        ranked = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)
+        best = scores[ranked[0]]
+        if best <= 0:
+            return None
+        runner_up = scores[ranked[1]] if len(ranked) > 1 else 0.0
+        return RouteMatch(
+            agent_name=self.agents[ranked[0]],
+            score=best,
+            confidence=(best - runner_up) / best * (1 - math.exp(-best)),
+        )
+
+
+def labelled_queries(rows: Iterable[Dict]) -> Iterator[Tuple[str, str]]:
+    """
+    Pair each user query in exported history rows with the agent that
+    answered it. Rows must be ordered by conversation and seq, as the
+    history export writes them.
+    """
+    pending: Dict[str, str] = {}
+    for row in rows:
+        turn = unwrap_turn(row.get("turn"))
+        conversation_id = row.get("conversation_id")
+        if turn.get("role") == "user":
+            if turn.get("query"):
+                pending[conversation_id] = str(turn["query"])
+        elif turn.get("agent") and conversation_id in pending:
+            yield pending.pop(conversation_id), str(turn["agent"])
+
+
+def evaluate(
+    index: RoutingIndex, samples: Iterable[Tuple[str, str]], threshold: float
+) -> Dict:
+    """
+    Replay labelled traffic through the index at the given threshold.
+
+    `coverage` is the share of messages routed without the LLM and
+    `precision` the share of those sent to the agent that actually answered.
+    """
+    total = routed = correct = 0
+    elapsed = 0.0
+    for message, expected in samples:
+        total += 1
+        started = time.perf_counter()
+        match = index.classify(message)
+        elapsed += time.perf_counter() - started
+        if match is None or match.confidence < threshold:
+            continue
+        routed += 1
+        if match.agent_name.lower() == expected.lower():
+            correct += 1
+    return {
+        "threshold": threshold,
+        "messages": total,
+        "routed": routed,
+        "correct": correct,
+        "coverage": routed / total if total else 0.0,
+        "precision": correct / routed if routed else 0.0,
+        "mean_classify_us": elapsed / total * 1e6 if total else 0.0,
+    }
@@ -1,10 +1,12 @@
+import asyncio
 import os
 import logging
 import ssl
 import certifi
 import aiohttp
 import redis.asyncio as redis
-from src.common.config.config import Auth
+from src.common.config.config import Auth, DeadlineConfig
+from src.common.context.deadline import retry, time_left, within_deadline
 from src.common.logger.logger import get_logger
 
 logger = get_logger("DESCOPE AUTH")
@@ -43,7 +45,13 @@ class OAuth:
 
         # Check cache first
         logger.info("check for existing token")
-        cached = await redis_client.get(cache_key)
+        cached = await retry(
+            lambda: within_deadline(
+                redis_client.get(cache_key), DeadlineConfig.REDIS_TIMEOUT
+            ),
+            "auth.redis_get",
+            retry_on=(redis.ConnectionError, redis.TimeoutError, TimeoutError),
+        )
         if cached:
             logger.info("Cache hit for agent '%s'", agent_name)
             return cached
@@ -58,17 +66,13 @@ class OAuth:
             "scope": {agent_name},
         }
 
-        # Make async HTTP request with SSL context
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        timeout = aiohttp.ClientTimeout(total=20)
-        connector = aiohttp.TCPConnector(ssl=ssl_context)
         logger.info(f"Fetch new token from descope for agent:{agent_name}")
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.post(Auth.Descope.DESCOPE_TOKEN_URL, data=data) as resp:
-                resp.raise_for_status()
-                res = await resp.json()
+        # A client_credentials grant has no side effects, so it is retried
+        res = await retry(
+            lambda: self._request_token(data),
+            "auth.descope",
+            retry_on=(aiohttp.ClientConnectionError, asyncio.TimeoutError),
+        )
         # Extract token and expiration
         token = res.get("access_token")
         logger.info("fetched token successfully")
@@ -80,7 +84,9 @@ class OAuth:
 
         # Cache with TTL (subtract buffer to prevent expired token usage)
         ttl = max(0, expires_in - TOKEN_BUFFER_SECONDS)
-        await redis_client.set(cache_key, token, ex=ttl)
+        await within_deadline(
+            redis_client.set(cache_key, token, ex=ttl), DeadlineConfig.REDIS_TIMEOUT
+        )
 
         logger.info(
             "Stored new token for agent '%s' in Redis with TTL=%s seconds",
@@ -88,3 +94,17 @@ class OAuth:
             ttl,
         )
         return token
+
+    @staticmethod
+    async def _request_token(data: dict) -> dict:
+        """POST the token request within what is left of the turn"""
+        # Make async HTTP request with SSL context
+        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        timeout = aiohttp.ClientTimeout(total=time_left(DeadlineConfig.DESCOPE_TIMEOUT))
+        connector = aiohttp.TCPConnector(ssl=ssl_context)
+        async with aiohttp.ClientSession(
+            timeout=timeout, connector=connector
+        ) as session:
+            async with session.post(Auth.Descope.DESCOPE_TOKEN_URL, data=data) as resp:
+                resp.raise_for_status()
+                return await resp.json()
@@ -1,6 +1,8 @@
+import json
 import os
 from dotenv import load_dotenv
 import uuid
+from src.common.config.constants import LlmConfig
 
 load_dotenv()
 
@@ -31,3 +33,148 @@ class AgenticSystemConfig:
 class ConversationConfig:
     CONTEXT_ID = os.getenv("CONTEXT_ID", str(uuid.uuid4()))
     USER_ID = os.getenv("USER_ID", str(uuid.uuid4()))
+
+
+class DatabaseConfig:
+    DATABASE_URL = os.getenv("DATABASE_URL", "")
+    POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+    POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "3600"))
+    HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "1000"))
+    HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "100"))
+    HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.05"))
+    # Failed history batches: retries, then row-by-row rounds before a turn
+    # is given up on (and logged in full)
+    HISTORY_FLUSH_RETRIES = int(os.getenv("HISTORY_FLUSH_RETRIES", "3"))
+    HISTORY_FLUSH_BACKOFF = float(os.getenv("HISTORY_FLUSH_BACKOFF", "0.5"))
+    HISTORY_FLUSH_MAX_REQUEUES = int(os.getenv("HISTORY_FLUSH_MAX_REQUEUES", "10"))
+    HISTORY_CACHE_MAX_ENTRIES = int(os.getenv("HISTORY_CACHE_MAX_ENTRIES", "10000"))
+    HISTORY_CACHE_MAX_TURNS = int(os.getenv("HISTORY_CACHE_MAX_TURNS", "32"))
+    HISTORY_CACHE_MAX_BYTES = int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(64 << 20)))
+    HISTORY_CACHE_TTL = float(os.getenv("HISTORY_CACHE_TTL", "300"))
+    ARCHIVE_AFTER_HOURS = float(os.getenv("HISTORY_ARCHIVE_AFTER_HOURS", "24"))
+    ARCHIVE_RETENTION_DAYS = int(os.getenv("HISTORY_ARCHIVE_RETENTION_DAYS", "90"))
+    ARCHIVE_PARTITIONED = os.getenv("HISTORY_ARCHIVE_PARTITIONED", "false") == "true"
+    COMPACT_KEEP_TURNS = int(os.getenv("HISTORY_COMPACT_KEEP_TURNS", "50"))
+    RETENTION_INTERVAL = float(os.getenv("HISTORY_RETENTION_INTERVAL", "3600"))
+    RETENTION_BATCH_SIZE = int(os.getenv("HISTORY_RETENTION_BATCH_SIZE", "200"))
+
+
+class OrchestratorConfig:
+    STREAM_TOKENS = os.getenv("ORCH_STREAM_TOKENS", "true") == "true"
+    FAST_PATH_ENABLED = os.getenv("ORCH_FAST_PATH_ENABLED", "true") == "true"
+    # Relay sub-agent status and artifact updates to the caller as they arrive
+    STREAM_DELEGATION = os.getenv("ORCH_STREAM_DELEGATION", "true") == "true"
+    # Return a successful delegation's answer without a second LLM pass
+    SKIP_ECHO_PASS = os.getenv("ORCH_SKIP_ECHO_PASS", "true") == "true"
+    # Seconds cancel() waits for a cancelled turn to unwind
+    CANCEL_GRACE = float(os.getenv("ORCH_CANCEL_GRACE", "2"))
+    # Router model tiers, cheapest first; later tiers are escalation targets
+    MODEL_TIERS = os.getenv(
+        "ORCH_MODEL_TIERS",
+        f"{LlmConfig.Anthropic.HAIKU_3_MODEL},"
+        f"{LlmConfig.Anthropic.SONET_4_MODEL},"
+        f"{LlmConfig.Anthropic.OPUS_4_MODEL}",
+    ).split(",")
+    # Messages the routing index finds ambiguous below this skip the fast tier
+    TIER_MIN_CONFIDENCE = float(os.getenv("ORCH_TIER_MIN_CONFIDENCE", "0.2"))
+    # Messages for an agent with this skill start on the strongest tier
+    TRIAGE_SKILL = os.getenv("ORCH_TRIAGE_SKILL", "emergency_triage")
+    # Seconds a router LLM call may take, per provider attempt
+    LLM_DEADLINE = float(os.getenv("ORCH_LLM_DEADLINE", "30"))
+    # Send a second identical request once the p95 first-response time passes
+    LLM_HEDGE_ENABLED = os.getenv("ORCH_LLM_HEDGE_ENABLED", "true") == "true"
+    LLM_HEDGE_DEFAULT_DELAY = float(os.getenv("ORCH_LLM_HEDGE_DEFAULT_DELAY", "3"))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("ORCH_LLM_HEDGE_MIN_DELAY", "0.5"))
+    # Secondary provider used when a tier times out or fails, "" to disable
+    LLM_FALLBACK_MODEL = os.getenv(
+        "ORCH_LLM_FALLBACK_MODEL", LlmConfig.Google.GOOGLE_1_5_MODEL
+    )
+    # Tokens of conversation history sent to the router LLM
+    HISTORY_TOKEN_BUDGET = int(os.getenv("ORCH_HISTORY_TOKEN_BUDGET", "2000"))
+    # Mark the static instruction prefix for Anthropic prompt caching
+    PROMPT_CACHING = os.getenv("ORCH_PROMPT_CACHING", "true") == "true"
+    ROUTING_INDEX_ENABLED = os.getenv("ORCH_ROUTING_INDEX_ENABLED", "true") == "true"
+    # Minimum routing index confidence to skip the LLM
+    ROUTING_CONFIDENCE_THRESHOLD = float(
+        os.getenv("ORCH_ROUTING_CONFIDENCE_THRESHOLD", "0.6")
+    )
+
+
+class DeadlineConfig:
+    # Seconds a turn may take; callers can ask for less (or more, up to the
+    # maximum) with the header, in seconds
+    TURN_DEFAULT = float(os.getenv("TURN_DEADLINE", "60"))
+    TURN_MAX = float(os.getenv("TURN_DEADLINE_MAX", "300"))
+    HEADER = os.getenv("TURN_DEADLINE_HEADER", "X-Request-Timeout")
+    # Upper bounds per call, further limited by what is left of the turn
+    DB_TIMEOUT = float(os.getenv("DEADLINE_DB_TIMEOUT", "10"))
+    REDIS_TIMEOUT = float(os.getenv("DEADLINE_REDIS_TIMEOUT", "2"))
+    DESCOPE_TIMEOUT = float(os.getenv("DEADLINE_DESCOPE_TIMEOUT", "20"))
+    MCP_TIMEOUT = float(os.getenv("DEADLINE_MCP_TIMEOUT", "10"))
+    # Jittered retries of idempotent calls (reads, token requests)
+    RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.1"))
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "2"))
+
+
+class McpConfig:
+    # Seconds between MCP tool discoveries, and between retries while no
+    # MCP server could be reached
+    REFRESH_INTERVAL = float(os.getenv("MCP_REFRESH_INTERVAL", "300"))
+    RETRY_INTERVAL = float(os.getenv("MCP_RETRY_INTERVAL", "15"))
+
+
+class LlmCacheConfig:
+    ENABLED = os.getenv("LLM_CACHE_ENABLED", "true") == "true"
+    # "memory" (per process) or "redis" (shared across replicas)
+    BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    TTL = float(os.getenv("LLM_CACHE_TTL", "300"))
+    MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+
+
+class AgentRegistryConfig:
+    # Seconds between background refreshes of the agent cards
+    REFRESH_INTERVAL = float(os.getenv("AGENT_REGISTRY_TTL", "300"))
+    # Seconds each agent gets to serve its card; slower agents keep their
+    # last known card instead of delaying the whole load
+    FETCH_TIMEOUT = float(os.getenv("AGENT_REGISTRY_FETCH_TIMEOUT", "5"))
+
+
+class DelegationConfig:
+    # Seconds to wait for a sub-agent to answer a delegated message
+    CALL_TIMEOUT = float(os.getenv("DELEGATION_TIMEOUT", "120"))
+    # Consecutive failures that open an agent's circuit, and for how long
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("DELEGATION_BREAKER_FAILURES", "3"))
+    BREAKER_OPEN_SECONDS = float(os.getenv("DELEGATION_BREAKER_OPEN_SECONDS", "30"))
+    # Pooled keep-alive client per sub-agent. DELEGATION_CLIENTS overrides
+    # these per agent, e.g. {"FireAgent": {"max_connections": 50, "http2": true}}
+    POOL_MAX_CONNECTIONS = int(os.getenv("DELEGATION_POOL_MAX_CONNECTIONS", "20"))
+    POOL_MAX_KEEPALIVE = int(os.getenv("DELEGATION_POOL_MAX_KEEPALIVE", "10"))
+    POOL_KEEPALIVE_EXPIRY = float(os.getenv("DELEGATION_KEEPALIVE_EXPIRY", "60"))
+    CONNECT_TIMEOUT = float(os.getenv("DELEGATION_CONNECT_TIMEOUT", "5"))
+    HTTP2 = os.getenv("DELEGATION_HTTP2", "false") == "true"
+    CLIENTS = json.loads(os.getenv("DELEGATION_CLIENTS", "{}"))
+    # Active health checks against each agent's card endpoint
+    PROBE_INTERVAL = float(os.getenv("DELEGATION_PROBE_INTERVAL", "15"))
+    PROBE_TIMEOUT = float(os.getenv("DELEGATION_PROBE_TIMEOUT", "2"))
+    # Fan-out delegation: per-agent deadline and most agents per call
+    FAN_OUT_TIMEOUT = float(os.getenv("DELEGATION_FAN_OUT_TIMEOUT", "30"))
+    FAN_OUT_MAX_AGENTS = int(os.getenv("DELEGATION_FAN_OUT_MAX_AGENTS", "5"))
+    # Seconds allowed for telling a sub-agent to cancel a task we abandoned
+    CANCEL_TIMEOUT = float(os.getenv("DELEGATION_CANCEL_TIMEOUT", "5"))
+
+    @classmethod
+    def client_settings(cls, agent_name: str) -> dict:
+        return {
+            "max_connections": cls.POOL_MAX_CONNECTIONS,
+            "max_keepalive_connections": cls.POOL_MAX_KEEPALIVE,
+            "keepalive_expiry": cls.POOL_KEEPALIVE_EXPIRY,
+            "timeout": cls.CALL_TIMEOUT,
+            "connect_timeout": cls.CONNECT_TIMEOUT,
+            "http2": cls.HTTP2,
+            **cls.CLIENTS.get(agent_name, {}),
+        }
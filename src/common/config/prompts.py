@@ -33,20 +33,24 @@ class AgentPrompts:
         #     "SPECIAL TOOLCALLS:\n"
         #     "- When there is a crime in progress form a reason and do the TOOLCALL: call_cops(reason)"
         # )
+        # Static prefix: identical across requests so it can be prompt-cached.
+        # The per-request history goes in HISTORY, sent with the user message.
         INSTRUCTION = (
             "You are an Emergency Agent Router.\n\n"
             "AVAILABLE AGENTS:\n"
             "- Names: {agentlist}\n"
             "- Capabilities: {agentcards}\n\n"
             "CONVERSATION CONTEXT:\n"
-            "- History: {conversation_history}\n"
-            '- Format: [{{"user": "message", "agent": {{json response}}, "agent_name": "actual_agent"}}]\n\n'
+            "- The user message starts with the conversation history, oldest entry first.\n"
+            '- Format: [{{"role": "user", "query": "message"}}, {{"agent": "actual_agent", "response": "...", "next_agent": "..."}}]\n\n'
             "ROUTING LOGIC:\n"
             "1. If the last conversation entry contains a `next_agent`, always select that agent.\n"
             "   - If `next_agent` is one of {agentlist}, call: redirect_agent(agent_name, latest_user_message).\n"
             "   - If `next_agent` is `operator_handoff`, call: operator_handoff(summary_of_situation).\n"
             "2. Otherwise, select the most suitable agent from {agentlist} using conversation history and agent cards.\n"
             "3. The selected agent must be one from {agentlist}.\n"
+            "   - If the situation needs several agents at once (e.g. a fire with injuries), call: fan_out_agents(agent_names, latest_user_message, merge)\n"
+            "     with the most important agent first; merge is `all` to combine every answer, `first` for the fastest, `priority` for the first listed agent that answers.\n"
             "4. Always perform a tool call — never generate JSON manually.\n\n"
             "SPECIAL TOOLCALLS:\n"
             # "- When there is a crime in progress, form a reason and perform: call_cops(reason).\n"
@@ -54,6 +58,9 @@ class AgentPrompts:
             "RESPONSE FORMAT:\n"
             "- Always return exactly the JSON string produced by the tool call."
         )
+        HISTORY: str = (
+            "CONVERSATION HISTORY:\n{conversation_history}\n\nLATEST USER MESSAGE:"
+        )
 
     class FireAgent:
         NAME: str = "FireAgent"
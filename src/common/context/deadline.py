@@ -0,0 +1,90 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, Mapping, Optional, Tuple, Type, TypeVar
+from src.common.config.config import DeadlineConfig
+from src.common.context.turn_context import DEADLINE_METADATA_KEY, current_turn
+from src.common.metrics.metrics import metrics
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """The current turn has no time left for another call"""
+
+
+def turn_budget(
+    headers: Optional[Mapping[str, str]] = None,
+    metadata: Optional[Mapping] = None,
+) -> float:
+    """
+    Seconds the caller allows for a turn: the deadline header, else the
+    budget forwarded in A2A metadata, else the default; at most the maximum.
+    """
+    candidates = [
+        (headers or {}).get(DeadlineConfig.HEADER.lower()),
+        (metadata or {}).get(DEADLINE_METADATA_KEY),
+    ]
+    for value in candidates:
+        try:
+            budget = float(value)
+        except (TypeError, ValueError):
+            continue
+        if budget > 0:
+            return min(budget, DeadlineConfig.TURN_MAX)
+    return DeadlineConfig.TURN_DEFAULT
+
+
+def time_left(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds a call may take: the current turn's remaining budget, at most
+    `cap`. Outside a turn, or for a turn without a deadline, just `cap`.
+
+    Raises DeadlineExceeded once the budget is spent, so no call is started
+    that could not finish in time.
+    """
+    try:
+        left = current_turn().time_left()
+    except RuntimeError:
+        left = None
+    if left is None:
+        return cap
+    if left <= 0:
+        metrics.incr("deadline.exceeded")
+        raise DeadlineExceeded("Turn deadline exceeded")
+    return left if cap is None else min(cap, left)
+
+
+async def within_deadline(call: Awaitable[T], cap: Optional[float] = None) -> T:
+    """Await `call`, cancelling it when the turn budget (or `cap`) runs out"""
+    async with asyncio.timeout(time_left(cap)):
+        return await call
+
+
+async def retry(
+    call: Callable[[], Awaitable[T]],
+    name: str,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    attempts: int = DeadlineConfig.RETRY_ATTEMPTS,
+) -> T:
+    """
+    Call an idempotent operation, retrying failures with full-jitter
+    exponential backoff. A retry is only made if its backoff fits in the
+    turn's remaining budget.
+    """
+    for attempt in range(attempts - 1):
+        try:
+            return await call()
+        except retry_on:
+            delay = random.uniform(
+                0,
+                min(
+                    DeadlineConfig.RETRY_MAX_DELAY,
+                    DeadlineConfig.RETRY_BASE_DELAY * 2**attempt,
+                ),
+            )
+            left = time_left()
+            if left is not None and left <= delay:
+                raise
+            metrics.incr(f"retry.{name}")
+            await asyncio.sleep(delay)
+    return await call()
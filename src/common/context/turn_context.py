@@ -0,0 +1,73 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+from a2a.server.tasks import TaskUpdater
+from src.common.agent_registry.routing_index import RouteMatch
+
+# A2A message metadata key carrying the caller's remaining budget in seconds
+DEADLINE_METADATA_KEY = "deadline_seconds"
+
+
+@dataclass
+class TurnContext:
+    """
+    Everything that belongs to a single orchestrator turn.
+
+    One instance is created per incoming A2A message and made current for
+    the duration of the turn, so tools and callbacks running on a shared
+    agent read the caller's identifiers instead of instance attributes that
+    a concurrent turn could overwrite.
+    """
+
+    context_id: str
+    user_id: Optional[str] = None
+    role: Optional[str] = None
+    query: Optional[str] = None
+    # Index into the orchestrator's model tiers to start this turn with
+    model_tier: int = 0
+    # The routing index's match for `query`, once it has been classified
+    route_match: Optional[RouteMatch] = None
+    route_classified: bool = False
+    # The caller's task, for relaying sub-agent updates while they stream
+    updater: Optional[TaskUpdater] = None
+    # Event loop time by which the turn must be answered
+    deadline: Optional[float] = None
+
+    def time_left(self) -> Optional[float]:
+        """Seconds until the deadline, None if the turn has none"""
+        if self.deadline is None:
+            return None
+        return self.deadline - asyncio.get_running_loop().time()
+
+    def metadata(self) -> dict:
+        """Metadata forwarded to sub-agents"""
+        return {
+            "user_id": self.user_id,
+            "context_id": self.context_id,
+            "role": self.role,
+        }
+
+
+_current_turn: ContextVar[Optional[TurnContext]] = ContextVar(
+    "current_turn", default=None
+)
+
+
+def current_turn() -> TurnContext:
+    """Return the turn being processed by the current task"""
+    turn = _current_turn.get()
+    if turn is None:
+        raise RuntimeError("No orchestrator turn is active in this context")
+    return turn
+
+
+@contextmanager
+def turn_scope(turn: TurnContext) -> Iterator[TurnContext]:
+    """Make `turn` current for the enclosed block"""
+    token = _current_turn.set(turn)
+    try:
+        yield turn
+    finally:
+        _current_turn.reset(token)
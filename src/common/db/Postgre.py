@@ -1,143 +1,364 @@
 import psycopg
 import psycopg.rows
+from psycopg.types.json import Jsonb
 import json
 import os
-from typing import List, Dict, Optional
+from datetime import datetime
+from typing import AsyncIterator, List, Dict, Optional
+from src.common.config.config import DeadlineConfig
+from src.common.context.deadline import retry, within_deadline
+from src.common.db.pool import PostgresPool, postgres_pool
+from src.common.db.turns import as_turn, normalize_turn, unwrap_turn
+from src.common.logger.logger import get_logger
+
+logger = get_logger("ConversationHistory")
+
+
+def safe_load(data) -> list:
+    """Recursively decode JSON strings until we get a flat list of turns"""
+    while isinstance(data, str):
+        try:
+            data = json.loads(data)
+        except Exception:
+            break
+    if isinstance(data, dict):
+        return [data]
+    if isinstance(data, list):
+        flattened = []
+        for item in data:
+            if isinstance(item, str):
+                try:
+                    loaded = json.loads(item)
+                    if isinstance(loaded, list):
+                        flattened.extend(loaded)
+                    else:
+                        flattened.append(loaded)
+                except Exception:
+                    flattened.append({"text": item})
+            elif isinstance(item, dict):
+                flattened.append(item)
+            else:
+                flattened.append({"value": item})
+        return flattened
+    return []
+
+
+def legacy_turns(conversation) -> List[Dict]:
+    """
+    Turns of a legacy JSONB-array row. Turns kept as a Python repr under
+    `text` are unwrapped, so queries on their fields find them.
+    """
+    return [as_turn(unwrap_turn(turn)) for turn in safe_load(conversation)]
 
 
 class ConversationHistoryManager:
-    def __init__(self, database_url: str = None):
-        self.database_url = database_url or os.getenv("DATABASE_URL")
+    """
+    Stores conversation history as one row per turn keyed by
+    (conversation_id, seq), so appending a turn is a single INSERT
+    regardless of how long the conversation already is.
+
+    A small head row per conversation holds the last allocated seq. Appends
+    bump it with INSERT ... ON CONFLICT DO UPDATE in the same statement that
+    inserts the turn, so concurrent appends to one conversation are
+    serialised by the head row lock and never collide or get lost.
+    """
+
+    def __init__(self, pool: PostgresPool = None):
+        self.pool = pool or postgres_pool
+        # Legacy one-JSONB-array-per-conversation table, only read by the migration
         self.table_name = os.getenv("CONVERSATION_TABLE", "conversationss")
+        self.turns_table = os.getenv("CONVERSATION_TURNS_TABLE", "conversation_turns")
+        self.heads_table = os.getenv("CONVERSATION_HEADS_TABLE", "conversations")
 
     async def _create_table(self):
-        """Create conversation table"""
-        async with await psycopg.AsyncConnection.connect(self.database_url) as conn:
+        """Create conversation head and turn tables"""
+        async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(
                     f"""
-                    CREATE TABLE IF NOT EXISTS {self.table_name} (
-                        username VARCHAR(255) NOT NULL,
+                    CREATE TABLE IF NOT EXISTS {self.turns_table} (
                         conversation_id VARCHAR(255) NOT NULL,
-                        conversation JSONB NOT NULL,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        PRIMARY KEY (conversation_id)
+                        seq INTEGER NOT NULL,
+                        username VARCHAR(255),
+                        turn JSONB NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (conversation_id, seq)
                     );
                     """
                 )
-            await conn.commit()
-
-    async def store(self, username: str, conversation_id: str, conversation):
-        """Store/update conversation with automatic str->dict handling"""
-        if isinstance(conversation, str):
-            try:
-                conversation = json.loads(conversation)
-            except json.JSONDecodeError:
-                conversation = {"text": conversation}
-
-        async with await psycopg.AsyncConnection.connect(self.database_url) as conn:
-            async with conn.cursor() as cur:
                 await cur.execute(
-                    f"SELECT conversation FROM {self.table_name} WHERE conversation_id = %s",
-                    (conversation_id,),
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {self.turns_table}_created_at_idx
+                    ON {self.turns_table} (created_at);
+                    """
+                )
+                await cur.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {self.heads_table} (
+                        conversation_id VARCHAR(255) PRIMARY KEY,
+                        username VARCHAR(255),
+                        last_seq INTEGER NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+                    """
+                )
+                # Highest seq folded into the summary turn by compaction
+                await cur.execute(
+                    f"""
+                    ALTER TABLE {self.heads_table}
+                    ADD COLUMN IF NOT EXISTS compacted_seq INTEGER NOT NULL DEFAULT 0;
+                    """
+                )
+                await cur.execute(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS {self.heads_table}_uncompacted_idx
+                    ON {self.heads_table} ((last_seq - compacted_seq));
+                    """
                 )
-                result = await cur.fetchone()
-
-                if result:
-                    try:
-                        existing_data = json.loads(result[0])
-                    except Exception:
-                        existing_data = []
 
-                    if not isinstance(existing_data, list):
-                        existing_data = [existing_data]
+    def _append_sql(self) -> str:
+        # The VALUES seq seeds the head for conversations whose turns predate it
+        return f"""
+            WITH head AS (
+                INSERT INTO {self.heads_table} AS h
+                    (conversation_id, username, last_seq)
+                VALUES (
+                    %(conversation_id)s::varchar,
+                    %(username)s::varchar,
+                    (
+                        SELECT COALESCE(MAX(seq), 0) + 1
+                        FROM {self.turns_table}
+                        WHERE conversation_id = %(conversation_id)s::varchar
+                    )
+                )
+                ON CONFLICT (conversation_id) DO UPDATE
+                SET last_seq = h.last_seq + 1,
+                    username = COALESCE(h.username, EXCLUDED.username),
+                    updated_at = CURRENT_TIMESTAMP
+                RETURNING last_seq
+            )
+            INSERT INTO {self.turns_table} (conversation_id, seq, username, turn)
+            SELECT
+                %(conversation_id)s::varchar, last_seq, %(username)s::varchar, %(turn)s
+            FROM head
+            """
 
-                    existing_data.append(conversation)
+    async def store(self, username: str, conversation_id: str, conversation):
+        """Append one turn with automatic str->dict handling"""
+        await self.store_many([(username, conversation_id, conversation)])
 
-                    await cur.execute(
-                        f"""
-                        UPDATE {self.table_name} 
-                        SET conversation = %s, updated_at = CURRENT_TIMESTAMP
-                        WHERE conversation_id = %s
-                        """,
-                        (json.dumps(existing_data), conversation_id),
-                    )
-                else:
-                    await cur.execute(
-                        f"""
-                        INSERT INTO {self.table_name} (username, conversation_id, conversation)
-                        VALUES (%s, %s, %s)
-                        """,
-                        (username, conversation_id, json.dumps([conversation])),
-                    )
-            await conn.commit()
+    async def store_many(self, turns: List[tuple]):
+        """
+        Append several (username, conversation_id, conversation) turns in one
+        transaction. The inserts are pipelined into a single round trip and
+        applied in list order, so per-conversation ordering is preserved.
+        """
+        params = [
+            {
+                "conversation_id": conversation_id,
+                "username": username,
+                "turn": Jsonb(normalize_turn(conversation)),
+            }
+            for username, conversation_id, conversation in turns
+        ]
+        if not params:
+            return
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.executemany(self._append_sql(), params)
 
     async def fetch(self, conversation_id: str) -> Optional[Dict]:
         """Fetch conversation by ID"""
-        async with await psycopg.AsyncConnection.connect(self.database_url) as conn:
+        async with self.pool.connection() as conn:
             async with conn.cursor(row_factory=psycopg.rows.dict_row) as cur:
                 await cur.execute(
                     f"""
-                    SELECT username, conversation_id, conversation 
-                    FROM {self.table_name} 
+                    SELECT username, turn
+                    FROM {self.turns_table}
                     WHERE conversation_id = %s
+                    ORDER BY seq
                     """,
                     (conversation_id,),
                 )
-                result = await cur.fetchone()
-                if result:
-                    try:
-                        result["conversation"] = json.loads(result["conversation"])
-                    except Exception:
-                        pass
-                return result
+                rows = await cur.fetchall()
+                if not rows:
+                    return None
+                return {
+                    "username": rows[0]["username"],
+                    "conversation_id": conversation_id,
+                    "conversation": [row["turn"] for row in rows],
+                }
 
     async def fetch_last_n(self, conversation_id: str, n: int = 10) -> List[Dict]:
-        """Fetch last n interactions from a conversation with safe str->dict handling"""
-        async with await psycopg.AsyncConnection.connect(self.database_url) as conn:
+        """
+        Fetch the last n turns of a conversation, oldest first.
+
+        The newest n rows are picked through the (conversation_id, seq) primary
+        key and re-ordered in Postgres, so the cost depends on n rather than on
+        the conversation length. JSONB values arrive already decoded.
+        """
+        if n <= 0:
+            return []
+        return await retry(
+            lambda: within_deadline(
+                self._fetch_last_n(conversation_id, n), DeadlineConfig.DB_TIMEOUT
+            ),
+            "db.fetch_last_n",
+            retry_on=(psycopg.OperationalError, TimeoutError),
+        )
+
+    async def _fetch_last_n(self, conversation_id: str, n: int) -> List[Dict]:
+        async with self.pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    f"""
+                    SELECT turn FROM (
+                        SELECT seq, turn
+                        FROM {self.turns_table}
+                        WHERE conversation_id = %s
+                        ORDER BY seq DESC
+                        LIMIT %s
+                    ) last_turns
+                    ORDER BY seq
+                    """,
+                    (conversation_id, n),
+                )
+                rows = await cur.fetchall()
+        return [turn for (turn,) in rows]
+
+    async def last_seq(self, conversation_id: str) -> int:
+        """Seq of the conversation's newest turn, 0 if it has none"""
+        return await retry(
+            lambda: within_deadline(
+                self._last_seq(conversation_id), DeadlineConfig.DB_TIMEOUT
+            ),
+            "db.last_seq",
+            retry_on=(psycopg.OperationalError, TimeoutError),
+        )
+
+    async def _last_seq(self, conversation_id: str) -> int:
+        async with self.pool.connection() as conn:
             async with conn.cursor() as cur:
                 await cur.execute(
                     f"""
-                    SELECT conversation
-                    FROM {self.table_name} 
+                    SELECT last_seq FROM {self.heads_table}
                     WHERE conversation_id = %s
                     """,
                     (conversation_id,),
                 )
-                result = await cur.fetchone()
-
-                if not result or not result[0]:
-                    return []
-
-                raw_data = result[0]
-
-                def safe_load(data):
-                    """Recursively decode JSON strings until we get a list/dict"""
-                    while isinstance(data, str):
-                        try:
-                            data = json.loads(data)
-                        except Exception:
-                            break
-                    if isinstance(data, dict):
-                        return [data]
-                    if isinstance(data, list):
-                        flattened = []
-                        for item in data:
-                            if isinstance(item, str):
-                                try:
-                                    loaded = json.loads(item)
-                                    if isinstance(loaded, list):
-                                        flattened.extend(loaded)
-                                    else:
-                                        flattened.append(loaded)
-                                except Exception:
-                                    flattened.append({"text": item})
-                            elif isinstance(item, dict):
-                                flattened.append(item)
-                            else:
-                                flattened.append({"value": item})
-                        return flattened
-                    return []
-
-                all_interactions = safe_load(raw_data)
-                return all_interactions[-n:]
+                row = await cur.fetchone()
+        return row[0] if row else 0
+
+    async def stream_turns(
+        self,
+        since: datetime = None,
+        until: datetime = None,
+        username: str = None,
+        agent: str = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict]:
+        """
+        Stream turns ordered by (conversation_id, seq) through a server-side
+        cursor, so memory stays bounded by batch_size regardless of how many
+        turns match. All filters are optional; `agent` matches the `agent`
+        field of agent responses.
+        """
+        conditions = []
+        params = []
+        if since is not None:
+            conditions.append("created_at >= %s")
+            params.append(since)
+        if until is not None:
+            conditions.append("created_at < %s")
+            params.append(until)
+        if username is not None:
+            conditions.append("username = %s")
+            params.append(username)
+        if agent is not None:
+            conditions.append("turn->>'agent' = %s")
+            params.append(agent)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        async with self.pool.connection() as conn:
+            async with conn.cursor(
+                name="export_turns", row_factory=psycopg.rows.dict_row
+            ) as cur:
+                cur.itersize = batch_size
+                await cur.execute(
+                    f"""
+                    SELECT conversation_id, seq, username, created_at, turn
+                    FROM {self.turns_table}
+                    {where}
+                    ORDER BY conversation_id, seq
+                    """,
+                    params,
+                )
+                async for row in cur:
+                    yield row
+
+    async def migrate_legacy_blobs(self, batch_size: int = 500) -> int:
+        """
+        Convert rows of the legacy JSONB-array table into per-turn rows.
+
+        Each array element becomes one turn, numbered in array order, and the
+        conversation head is created with the last seq. Conversations that
+        already have turns are skipped, so the migration can be re-run
+        safely. Returns the number of turns written.
+        """
+        await self._create_table()
+        migrated = 0
+        async with self.pool.connection() as read_conn:
+            async with read_conn.cursor(name="legacy_conversations") as cur:
+                await cur.execute(
+                    f"""
+                    SELECT username, conversation_id, conversation, updated_at
+                    FROM {self.table_name} legacy
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {self.turns_table} t
+                        WHERE t.conversation_id = legacy.conversation_id
+                    )
+                    """
+                )
+                while rows := await cur.fetchmany(batch_size):
+                    params = [
+                        (
+                            conversation_id,
+                            seq,
+                            username,
+                            Jsonb(turn),
+                            updated_at,
+                        )
+                        for username, conversation_id, conversation, updated_at in rows
+                        for seq, turn in enumerate(legacy_turns(conversation), start=1)
+                    ]
+                    if not params:
+                        continue
+                    async with self.pool.connection() as write_conn:
+                        async with write_conn.cursor() as write_cur:
+                            await write_cur.executemany(
+                                f"""
+                                INSERT INTO {self.turns_table}
+                                    (conversation_id, seq, username, turn, created_at)
+                                VALUES (%s, %s, %s, %s, %s)
+                                ON CONFLICT (conversation_id, seq) DO NOTHING
+                                """,
+                                params,
+                            )
+                            await write_cur.execute(
+                                f"""
+                                INSERT INTO {self.heads_table} AS h
+                                    (conversation_id, username, last_seq, updated_at)
+                                SELECT conversation_id, MIN(username), MAX(seq),
+                                       MAX(created_at)
+                                FROM {self.turns_table}
+                                WHERE conversation_id = ANY(%s)
+                                GROUP BY conversation_id
+                                ON CONFLICT (conversation_id) DO UPDATE
+                                SET last_seq = GREATEST(h.last_seq, EXCLUDED.last_seq)
+                                """,
+                                (list({row[1] for row in rows}),),
+                            )
+                    migrated += len(params)
+                    logger.info("Migrated %s turns so far", migrated)
+        return migrated
@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from src.common.db.Postgre import ConversationHistoryManager
+from src.common.db.export import EXPORT_FORMATS, write_turns
+from src.common.db.pool import postgres_pool
+from src.common.db.retention import ConversationRetention
+from src.common.logger.logger import get_logger
+
+logger = get_logger("ConversationHistoryCLI")
+
+
+async def migrate(args: argparse.Namespace):
+    manager = ConversationHistoryManager()
+    migrated = await manager.migrate_legacy_blobs(batch_size=args.batch_size)
+    logger.info(
+        "Migrated %s turns from %s into %s",
+        migrated,
+        manager.table_name,
+        manager.turns_table,
+    )
+
+
+async def compact(args: argparse.Namespace):
+    report = await ConversationRetention().run_once()
+    logger.info("Retention report: %s", report)
+
+
+async def export(args: argparse.Namespace):
+    turns = ConversationHistoryManager().stream_turns(
+        since=args.since,
+        until=args.until,
+        username=args.username,
+        agent=args.agent,
+        batch_size=args.batch_size,
+    )
+    if args.output == "-":
+        count = await write_turns(turns, sys.stdout, args.format)
+    else:
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            count = await write_turns(turns, out, args.format)
+    logger.info("Exported %s turns as %s", count, args.format)
+
+
+async def run(args: argparse.Namespace):
+    await postgres_pool.open()
+    try:
+        await args.handler(args)
+    finally:
+        await postgres_pool.close()
+
+
+def main():
+    """
+    Maintenance commands for the conversation history store.
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.common.db")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser(
+        "migrate", help="Convert legacy JSONB-array rows into per-turn rows"
+    )
+    migrate_parser.add_argument("--batch-size", type=int, default=500)
+    migrate_parser.set_defaults(handler=migrate)
+
+    compact_parser = commands.add_parser(
+        "compact", help="Archive finished conversations, compact and purge history"
+    )
+    compact_parser.set_defaults(handler=compact)
+
+    export_parser = commands.add_parser(
+        "export", help="Stream conversation turns as NDJSON or CSV"
+    )
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+    export_parser.add_argument("--output", default="-", help="File path, - for stdout")
+    export_parser.add_argument("--since", type=datetime.fromisoformat)
+    export_parser.add_argument("--until", type=datetime.fromisoformat)
+    export_parser.add_argument("--username")
+    export_parser.add_argument("--agent")
+    export_parser.add_argument("--batch-size", type=int, default=1000)
+    export_parser.set_defaults(handler=export)
+
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
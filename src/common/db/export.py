@@ -0,0 +1,39 @@
+import csv
+import json
+from typing import AsyncIterator, Dict, TextIO
+
+EXPORT_FORMATS = ("ndjson", "csv")
+CSV_FIELDS = ["conversation_id", "seq", "username", "created_at", "turn"]
+
+
+def _serialize(row: Dict) -> Dict:
+    created_at = row.get("created_at")
+    return {
+        **row,
+        "created_at": created_at.isoformat() if created_at else None,
+    }
+
+
+async def write_turns(turns: AsyncIterator[Dict], out: TextIO, fmt: str) -> int:
+    """
+    Write streamed turns to `out` as NDJSON (one JSON object per line) or
+    CSV (turn encoded as a JSON string). Returns the number of rows written.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    count = 0
+    if fmt == "ndjson":
+        async for row in turns:
+            out.write(json.dumps(_serialize(row), default=str) + "\n")
+            count += 1
+        return count
+
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    async for row in turns:
+        row = _serialize(row)
+        row["turn"] = json.dumps(row["turn"], default=str)
+        writer.writerow(row)
+        count += 1
+    return count
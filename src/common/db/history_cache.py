@@ -0,0 +1,182 @@
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, List
+from src.common.config.config import DatabaseConfig
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("HistoryCache")
+
+
+class _Entry:
+    __slots__ = ("turns", "sizes", "bytes", "expires_at", "seq")
+
+    def __init__(self, max_turns: int, expires_at: float, seq: int | None = None):
+        self.turns: deque = deque(maxlen=max_turns)
+        self.sizes: deque = deque(maxlen=max_turns)
+        self.bytes = 0
+        self.expires_at = expires_at
+        # Number of turns the conversation had when filled, plus appends
+        self.seq = seq
+
+
+class HistoryCache:
+    """
+    Bounded LRU/TTL cache of the most recent turns per context_id.
+
+    Entries are filled from Postgres on a miss and kept current by
+    write-through `append` calls from the history writer, so a busy
+    conversation is served from memory on every turn. The cache is bounded
+    both by entry count and by an estimate of the bytes held.
+
+    The cache is process-local, so turns appended by another replica do not
+    reach it. When `get_or_load` is given a `version` callable (the
+    conversation's turn count as stored), a cached entry is only served
+    while its own count still matches; otherwise it is reloaded.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DatabaseConfig.HISTORY_CACHE_MAX_ENTRIES,
+        max_turns: int = DatabaseConfig.HISTORY_CACHE_MAX_TURNS,
+        max_bytes: int = DatabaseConfig.HISTORY_CACHE_MAX_BYTES,
+        ttl: float = DatabaseConfig.HISTORY_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # Appends seen while a load is in flight, so a racing fill can be dropped
+        self._loading: dict[str, int] = {}
+        self._generation: dict[str, int] = {}
+        self._bytes = 0
+
+    def get(self, context_id: str, n: int) -> List[Dict] | None:
+        """Return the last n cached turns, or None on a miss"""
+        entry = self._entries.get(context_id)
+        if entry is None or n > self.max_turns:
+            metrics.incr("history.cache.misses")
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(context_id)
+            metrics.incr("history.cache.misses")
+            return None
+        self._entries.move_to_end(context_id)
+        metrics.incr("history.cache.hits")
+        return list(entry.turns)[-n:] if n > 0 else []
+
+    def fill(self, context_id: str, turns: List[Dict], seq: int | None = None):
+        """Cache turns loaded from Postgres, replacing any existing entry"""
+        self._remove(context_id)
+        entry = _Entry(self.max_turns, time.monotonic() + self.ttl, seq)
+        self._entries[context_id] = entry
+        for turn in turns[-self.max_turns :]:
+            self._push(entry, turn)
+        self._evict()
+
+    def append(self, context_id: str, turn: Dict):
+        """Write-through of a newly stored turn"""
+        if context_id in self._loading:
+            self._generation[context_id] += 1
+        entry = self._entries.get(context_id)
+        if entry is None:
+            return
+        if entry.seq is not None:
+            entry.seq += 1
+        self._push(entry, turn)
+        self._entries.move_to_end(context_id)
+        self._evict()
+
+    def invalidate(self, context_id: str):
+        self._remove(context_id)
+
+    async def get_or_load(
+        self,
+        context_id: str,
+        n: int,
+        loader: Callable[[str, int], Awaitable[List[Dict]]],
+        version: Callable[[str], Awaitable[int]] = None,
+    ) -> List[Dict]:
+        """
+        Serve the last n turns from memory, falling back to `loader` on a
+        miss or, with `version`, when the cached entry is out of date
+        """
+        cached = self.get(context_id, n)
+        if cached is not None and (
+            version is None or await self._is_current(context_id, version)
+        ):
+            return cached
+        self._loading[context_id] = self._loading.get(context_id, 0) + 1
+        generation = self._generation.setdefault(context_id, 0)
+        try:
+            # Read the version before the turns: a turn stored in between
+            # then only makes the entry look stale
+            seq = await self._version(context_id, version) if version else None
+            turns = await loader(context_id, max(n, self.max_turns))
+            # Skip the fill if a turn was appended while loading: the loaded
+            # rows may not include it
+            if self._generation[context_id] == generation:
+                self.fill(context_id, turns, seq)
+        finally:
+            self._loading[context_id] -= 1
+            if not self._loading[context_id]:
+                del self._loading[context_id]
+                del self._generation[context_id]
+        return turns[-n:] if n > 0 else []
+
+    async def _is_current(
+        self, context_id: str, version: Callable[[str], Awaitable[int]]
+    ) -> bool:
+        """Whether the cached entry still holds every stored turn"""
+        seq = await self._version(context_id, version)
+        if seq is None:
+            # Cannot tell; the cached turns beat failing the turn
+            return True
+        entry = self._entries.get(context_id)
+        if entry is None or entry.seq != seq:
+            self._remove(context_id)
+            metrics.incr("history.cache.stale")
+            return False
+        return True
+
+    @staticmethod
+    async def _version(
+        context_id: str, version: Callable[[str], Awaitable[int]]
+    ) -> int | None:
+        try:
+            return await version(context_id)
+        except Exception as e:
+            logger.warning("Checking cached history of %s failed: %s", context_id, e)
+            metrics.incr("history.cache.check_errors")
+            return None
+
+    def _push(self, entry: _Entry, turn: Dict):
+        size = len(json.dumps(turn, default=str))
+        if len(entry.turns) == entry.turns.maxlen:
+            dropped = entry.sizes[0]
+            entry.bytes -= dropped
+            self._bytes -= dropped
+        entry.turns.append(turn)
+        entry.sizes.append(size)
+        entry.bytes += size
+        self._bytes += size
+
+    def _remove(self, context_id: str):
+        entry = self._entries.pop(context_id, None)
+        if entry is not None:
+            self._bytes -= entry.bytes
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            context_id, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.bytes
+            metrics.incr("history.cache.evictions")
+        metrics.set_gauge("history.cache.entries", len(self._entries))
+        metrics.set_gauge("history.cache.bytes", self._bytes)
+
+
+history_cache = HistoryCache()
@@ -0,0 +1,196 @@
+import asyncio
+import random
+from collections import defaultdict
+from src.common.config.config import DatabaseConfig
+from src.common.db.Postgre import ConversationHistoryManager
+from src.common.db.turns import normalize_turn
+from src.common.db.history_cache import HistoryCache, history_cache
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("HistoryWriter")
+
+
+class HistoryWriter:
+    """
+    Write-behind writer for conversation turns.
+
+    Turns are queued by `submit` and flushed by a single background task as
+    pipelined batch inserts, either once `batch_size` turns are waiting or
+    after `flush_interval` seconds. A full queue makes `submit` wait
+    (backpressure). Every submitted turn is also written through to the
+    in-process history cache. Because there is one consumer and batches are
+    applied in queue order, turns of one conversation are written in
+    submission order; `barrier` lets a reader wait until a conversation's
+    queued turns are durable before reading its history.
+
+    A failed batch is retried with backoff, then written row by row so one
+    bad turn cannot sink the rest. Turns that still fail go back to the
+    front of the queue; a turn is only given up on after
+    `HISTORY_FLUSH_MAX_REQUEUES` rounds, and is then logged in full.
+    """
+
+    def __init__(
+        self,
+        manager: ConversationHistoryManager = None,
+        max_queue: int = DatabaseConfig.HISTORY_QUEUE_SIZE,
+        batch_size: int = DatabaseConfig.HISTORY_BATCH_SIZE,
+        flush_interval: float = DatabaseConfig.HISTORY_FLUSH_INTERVAL,
+        cache: HistoryCache = None,
+    ):
+        self._manager = manager or ConversationHistoryManager()
+        self._cache = cache or history_cache
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._pending: dict[str, int] = defaultdict(int)
+        # Turns whose write failed, with how often they were re-queued;
+        # flushed before anything newer
+        self._requeued: list[tuple[tuple, int]] = []
+        self._flushed = asyncio.Condition()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="history-writer")
+            logger.info("History writer started")
+
+    async def stop(self):
+        """Stop accepting turns and drain everything still queued"""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info("History writer drained and stopped")
+
+    async def submit(self, username: str, conversation_id: str, conversation):
+        """
+        Queue one turn for writing. Waits while the queue is full and
+        writes synchronously when the writer is not running.
+        """
+        turn = normalize_turn(conversation)
+        if self._task is None or self._closing:
+            await self._manager.store(
+                username=username,
+                conversation_id=conversation_id,
+                conversation=turn,
+            )
+            self._cache.append(conversation_id, turn)
+            return
+        self._pending[conversation_id] += 1
+        self._cache.append(conversation_id, turn)
+        await self._queue.put((username, conversation_id, turn))
+        metrics.set_gauge("history.writer.queue_depth", self._queue.qsize())
+        if self._queue.qsize() >= self._batch_size:
+            self._wakeup.set()
+
+    def pending(self, conversation_id: str) -> int:
+        """Turns of a conversation queued here but not yet flushed"""
+        return self._pending.get(conversation_id, 0)
+
+    async def barrier(self, conversation_id: str):
+        """Wait until all queued turns of a conversation have been flushed"""
+        if not self._pending.get(conversation_id):
+            return
+        self._wakeup.set()
+        async with self._flushed:
+            await self._flushed.wait_for(lambda: not self._pending.get(conversation_id))
+
+    async def _run(self):
+        while not (self._closing and self._queue.empty() and not self._requeued):
+            if self._requeued:
+                # Give the database a moment before trying failed turns again
+                await asyncio.sleep(DatabaseConfig.HISTORY_FLUSH_BACKOFF)
+            elif self._queue.qsize() < self._batch_size and not self._closing:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._requeued[: self._batch_size]
+            self._requeued = self._requeued[self._batch_size :]
+            while len(batch) < self._batch_size and not self._queue.empty():
+                batch.append((self._queue.get_nowait(), 0))
+                self._queue.task_done()
+            if batch:
+                self._requeued = await self._flush(batch) + self._requeued
+
+    async def _store(self, turns: list[tuple], attempts: int) -> bool:
+        """Write turns in one batch, retrying with jittered backoff"""
+        for attempt in range(attempts):
+            try:
+                with metrics.timer("history.writer.flush_ms"):
+                    await self._manager.store_many(turns)
+                return True
+            except Exception as e:
+                logger.warning(
+                    "Flushing %s history turns failed (attempt %s): %s",
+                    len(turns),
+                    attempt + 1,
+                    e,
+                )
+                if attempt + 1 < attempts:
+                    backoff = DatabaseConfig.HISTORY_FLUSH_BACKOFF * 2**attempt
+                    await asyncio.sleep(random.uniform(0, backoff))
+        return False
+
+    async def _flush(self, batch: list[tuple[tuple, int]]) -> list[tuple[tuple, int]]:
+        """Write a batch; returns the turns to try again later"""
+        finished: list[tuple] = []
+        retry: list[tuple[tuple, int]] = []
+        try:
+            turns = [turn for turn, _ in batch]
+            if await self._store(turns, DatabaseConfig.HISTORY_FLUSH_RETRIES):
+                finished = turns
+                metrics.incr("history.writer.turns_written", len(turns))
+                return retry
+            # Row by row, so a bad turn does not sink the rest. Once a turn
+            # of a conversation fails, its later turns wait too: they must
+            # not be written ahead of it.
+            blocked: set[str] = set()
+            for turn, requeues in batch:
+                conversation_id = turn[1]
+                if conversation_id in blocked:
+                    retry.append((turn, requeues))
+                elif await self._store([turn], 1):
+                    finished.append(turn)
+                    metrics.incr("history.writer.turns_written")
+                elif requeues < DatabaseConfig.HISTORY_FLUSH_MAX_REQUEUES:
+                    blocked.add(conversation_id)
+                    retry.append((turn, requeues + 1))
+                else:
+                    finished.append(turn)
+                    self._give_up(turn, requeues + 1)
+            if retry:
+                metrics.incr("history.writer.turns_requeued", len(retry))
+            return retry
+        finally:
+            for _, conversation_id, _ in finished:
+                self._pending[conversation_id] -= 1
+                if self._pending[conversation_id] <= 0:
+                    del self._pending[conversation_id]
+            metrics.set_gauge("history.writer.queue_depth", self._queue.qsize())
+            async with self._flushed:
+                self._flushed.notify_all()
+
+    def _give_up(self, turn: tuple, attempts: int):
+        username, conversation_id, conversation = turn
+        metrics.incr("history.writer.turns_dropped")
+        self._cache.invalidate(conversation_id)
+        logger.error(
+            "Giving up on a history turn of %s (user %s) after %s rounds: %s",
+            conversation_id,
+            username,
+            attempts,
+            conversation,
+        )
+
+
+history_writer = HistoryWriter()
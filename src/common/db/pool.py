@@ -0,0 +1,93 @@
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+import psycopg
+from psycopg_pool import AsyncConnectionPool
+from src.common.config.config import DatabaseConfig
+from src.common.context.deadline import time_left
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("PostgresPool")
+
+
+class PostgresPool:
+    """
+    Process-wide async Postgres connection pool.
+
+    The pool is created closed and must be opened once at app startup
+    (`await postgres_pool.open()`) and closed at shutdown. Connections are
+    health-checked on checkout and the time spent waiting for a free
+    connection is recorded as the `db.pool.wait_ms` metric.
+    """
+
+    def __init__(
+        self,
+        database_url: str = None,
+        min_size: int = DatabaseConfig.POOL_MIN_SIZE,
+        max_size: int = DatabaseConfig.POOL_MAX_SIZE,
+        timeout: float = DatabaseConfig.POOL_TIMEOUT,
+        max_idle: float = DatabaseConfig.POOL_MAX_IDLE,
+        max_lifetime: float = DatabaseConfig.POOL_MAX_LIFETIME,
+    ):
+        self.database_url = database_url or DatabaseConfig.DATABASE_URL
+        self.timeout = timeout
+        self._pool = AsyncConnectionPool(
+            self.database_url,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout,
+            max_idle=max_idle,
+            max_lifetime=max_lifetime,
+            check=AsyncConnectionPool.check_connection,
+            name="conversation-history",
+            open=False,
+        )
+        self._opened = False
+
+    async def open(self, wait: bool = True):
+        """Open the pool, optionally waiting until min_size connections are ready"""
+        if self._opened:
+            return
+        await self._pool.open(wait=wait)
+        self._opened = True
+        logger.info(
+            "Postgres pool opened (min=%s, max=%s)",
+            self._pool.min_size,
+            self._pool.max_size,
+        )
+
+    async def close(self):
+        """Close the pool and all its connections"""
+        if not self._opened:
+            return
+        await self._pool.close()
+        self._opened = False
+        logger.info("Postgres pool closed")
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[psycopg.AsyncConnection]:
+        """
+        Borrow a connection from the pool.
+
+        The transaction is committed when the block exits cleanly and rolled
+        back on error, then the connection is returned to the pool.
+        """
+        if not self._opened:
+            await self.open()
+        start = time.perf_counter()
+        # Waiting for a connection counts against the turn's budget
+        async with self._pool.connection(timeout=time_left(self.timeout)) as conn:
+            metrics.observe("db.pool.wait_ms", (time.perf_counter() - start) * 1000)
+            yield conn
+
+    def stats(self) -> dict[str, int]:
+        """Pool statistics as reported by psycopg_pool"""
+        stats = self._pool.get_stats()
+        for key in ("pool_size", "pool_available", "requests_waiting"):
+            if key in stats:
+                metrics.set_gauge(f"db.pool.{key}", stats[key])
+        return stats
+
+
+postgres_pool = PostgresPool()
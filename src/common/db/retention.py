@@ -0,0 +1,382 @@
+import asyncio
+import os
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+from psycopg.types.json import Jsonb
+from src.common.config.config import DatabaseConfig
+from src.common.db.Postgre import ConversationHistoryManager
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("ConversationRetention")
+
+# pg_advisory_lock key so only one replica runs the job at a time
+RETENTION_LOCK_KEY = 0x434F4E56
+
+MAX_SUMMARY_MESSAGES = 20
+MAX_SUMMARY_MESSAGE_CHARS = 200
+
+
+def summarize_turns(turns: List[tuple]) -> Dict:
+    """
+    Collapse (seq, turn, created_at) rows, oldest first, into one compact
+    summary turn. Earlier summary turns are merged in, so repeated
+    compaction keeps a single summary at the head of the conversation.
+    """
+    summary = {
+        "turns": 0,
+        "from_seq": turns[0][0],
+        "to_seq": turns[-1][0],
+        "started_at": None,
+        "ended_at": None,
+        "agents": [],
+        "user_messages": [],
+        "next_agent": None,
+    }
+    for seq, turn, created_at in turns:
+        previous = turn.get("summary")
+        if isinstance(previous, dict):
+            summary["turns"] += previous.get("turns", 0)
+            summary["started_at"] = summary["started_at"] or previous.get("started_at")
+            summary["agents"].extend(
+                agent
+                for agent in previous.get("agents", [])
+                if agent not in summary["agents"]
+            )
+            summary["user_messages"].extend(previous.get("user_messages", []))
+            continue
+
+        summary["turns"] += 1
+        stamp = created_at.isoformat() if created_at else None
+        summary["started_at"] = summary["started_at"] or stamp
+        summary["ended_at"] = stamp
+        agent = turn.get("agent")
+        if agent and agent not in summary["agents"]:
+            summary["agents"].append(agent)
+        if turn.get("next_agent"):
+            summary["next_agent"] = turn["next_agent"]
+        if turn.get("role") == "user" and turn.get("query"):
+            summary["user_messages"].append(
+                str(turn["query"])[:MAX_SUMMARY_MESSAGE_CHARS]
+            )
+
+    summary["user_messages"] = summary["user_messages"][-MAX_SUMMARY_MESSAGES:]
+    return {"summary": summary}
+
+
+class ConversationRetention:
+    """
+    Background retention job for conversation history.
+
+    Each run:
+    - archives conversations whose last turn ended in `finish` and that have
+      been idle for `archive_after` into one compact row per conversation;
+    - collapses all but the newest `keep_turns` turns of long conversations
+      into a single summary turn;
+    - purges archived conversations older than `retention_days`, by dropping
+      whole monthly partitions when the archive table is partitioned.
+
+    Reported bytes are the logical payload sizes removed, the space becomes
+    reusable once autovacuum has processed the tables.
+    """
+
+    def __init__(
+        self,
+        manager: ConversationHistoryManager = None,
+        archive_after: timedelta = timedelta(hours=DatabaseConfig.ARCHIVE_AFTER_HOURS),
+        keep_turns: int = DatabaseConfig.COMPACT_KEEP_TURNS,
+        retention_days: int = DatabaseConfig.ARCHIVE_RETENTION_DAYS,
+        partitioned: bool = DatabaseConfig.ARCHIVE_PARTITIONED,
+        batch_size: int = DatabaseConfig.RETENTION_BATCH_SIZE,
+        interval: float = DatabaseConfig.RETENTION_INTERVAL,
+    ):
+        self.manager = manager or ConversationHistoryManager()
+        self.pool = self.manager.pool
+        self.archive_table = os.getenv(
+            "CONVERSATION_ARCHIVE_TABLE", "conversation_archive"
+        )
+        self.archive_after = archive_after
+        self.keep_turns = keep_turns
+        self.retention_days = retention_days
+        self.partitioned = partitioned
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def _create_table(self):
+        """Create the archive table, partitioned by month if configured"""
+        partitioning = "PARTITION BY RANGE (archived_at)" if self.partitioned else ""
+        async with self.pool.connection() as conn:
+            await conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {self.archive_table} (
+                    conversation_id VARCHAR(255) NOT NULL,
+                    username VARCHAR(255),
+                    conversation JSONB NOT NULL,
+                    turn_count INTEGER NOT NULL,
+                    started_at TIMESTAMP,
+                    ended_at TIMESTAMP,
+                    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (conversation_id, archived_at)
+                ) {partitioning};
+                """
+            )
+        if self.partitioned:
+            await self._ensure_partitions(date.today())
+
+    def _partition_name(self, month: date) -> str:
+        return f"{self.archive_table}_p{month:%Y%m}"
+
+    async def _ensure_partitions(self, today: date):
+        """Make sure this month's and next month's partitions exist"""
+        month = today.replace(day=1)
+        async with self.pool.connection() as conn:
+            for _ in range(2):
+                following = (month + timedelta(days=32)).replace(day=1)
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {self._partition_name(month)}
+                    PARTITION OF {self.archive_table}
+                    FOR VALUES FROM ('{month}') TO ('{following}')
+                    """
+                )
+                month = following
+
+    async def archive_finished(self) -> Dict[str, int]:
+        """Move idle, finished conversations into the archive table"""
+        archived = 0
+        reclaimed = 0
+        while True:
+            async with self.pool.connection() as conn:
+                cur = await conn.execute(
+                    f"""
+                    WITH done AS (
+                        SELECT h.conversation_id
+                        FROM {self.manager.heads_table} h
+                        JOIN {self.manager.turns_table} t
+                          ON t.conversation_id = h.conversation_id
+                         AND t.seq = h.last_seq
+                        WHERE h.updated_at < LOCALTIMESTAMP - %(age)s
+                          AND t.turn->>'next_agent' = 'finish'
+                        LIMIT %(batch)s
+                        FOR UPDATE OF h SKIP LOCKED
+                    ),
+                    moved AS (
+                        DELETE FROM {self.manager.turns_table} t
+                        USING done
+                        WHERE t.conversation_id = done.conversation_id
+                        RETURNING t.conversation_id, t.seq, t.username, t.turn,
+                                  t.created_at, pg_column_size(t.turn) AS size
+                    ),
+                    archived AS (
+                        INSERT INTO {self.archive_table}
+                            (conversation_id, username, conversation, turn_count,
+                             started_at, ended_at)
+                        SELECT conversation_id, MIN(username),
+                               jsonb_agg(turn ORDER BY seq), COUNT(*),
+                               MIN(created_at), MAX(created_at)
+                        FROM moved
+                        GROUP BY conversation_id
+                        RETURNING pg_column_size(conversation) AS size
+                    ),
+                    heads AS (
+                        DELETE FROM {self.manager.heads_table} h
+                        USING done
+                        WHERE h.conversation_id = done.conversation_id
+                    )
+                    SELECT
+                        (SELECT COUNT(*) FROM done),
+                        (SELECT COALESCE(SUM(size), 0) FROM moved)
+                            - (SELECT COALESCE(SUM(size), 0) FROM archived)
+                    """,
+                    {"age": self.archive_after, "batch": self.batch_size},
+                )
+                count, saved = await cur.fetchone()
+            archived += count
+            reclaimed += max(0, saved)
+            if count < self.batch_size:
+                return {"archived": archived, "bytes_reclaimed": reclaimed}
+
+    async def compact_long_conversations(self) -> Dict[str, int]:
+        """
+        Collapse all but the newest keep_turns turns into one summary turn.
+
+        Candidates come from the conversation heads: `last_seq - compacted_seq`
+        is the number of turns added since the conversation was last
+        compacted, so only conversations that grew are read, through an
+        index instead of a scan of the turns table.
+        """
+        compacted = 0
+        reclaimed = 0
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(
+                f"""
+                SELECT conversation_id
+                FROM {self.manager.heads_table}
+                WHERE last_seq - compacted_seq > %s
+                LIMIT %s
+                """,
+                (2 * self.keep_turns, self.batch_size),
+            )
+            candidates = [row[0] for row in await cur.fetchall()]
+
+        for conversation_id in candidates:
+            async with self.pool.connection() as conn:
+                # Holding the head row blocks appends to this conversation only
+                cur = await conn.execute(
+                    f"""
+                    SELECT last_seq FROM {self.manager.heads_table}
+                    WHERE conversation_id = %s
+                    FOR UPDATE
+                    """,
+                    (conversation_id,),
+                )
+                head = await cur.fetchone()
+                if head is None:
+                    continue
+                cutoff = head[0] - self.keep_turns
+                cur = await conn.execute(
+                    f"""
+                    DELETE FROM {self.manager.turns_table}
+                    WHERE conversation_id = %s AND seq <= %s
+                    RETURNING seq, username, turn, created_at,
+                              pg_column_size(turn)
+                    """,
+                    (conversation_id, cutoff),
+                )
+                rows = sorted(await cur.fetchall(), key=lambda row: row[0])
+                mark_compacted = f"""
+                    UPDATE {self.manager.heads_table}
+                    SET compacted_seq = %s
+                    WHERE conversation_id = %s
+                """
+                if len(rows) < 2:
+                    # Nothing to fold (e.g. turns already removed); do not
+                    # pick the conversation again until it grows
+                    await conn.rollback()
+                    await conn.execute(mark_compacted, (cutoff, conversation_id))
+                    continue
+                await conn.execute(mark_compacted, (cutoff, conversation_id))
+                summary = summarize_turns(
+                    [(seq, turn, created_at) for seq, _, turn, created_at, _ in rows]
+                )
+                cur = await conn.execute(
+                    f"""
+                    INSERT INTO {self.manager.turns_table}
+                        (conversation_id, seq, username, turn, created_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    RETURNING pg_column_size(turn)
+                    """,
+                    (
+                        conversation_id,
+                        rows[0][0],
+                        rows[0][1],
+                        Jsonb(summary),
+                        rows[0][3],
+                    ),
+                )
+                (summary_size,) = await cur.fetchone()
+            compacted += 1
+            reclaimed += max(0, sum(row[4] for row in rows) - summary_size)
+        return {"compacted": compacted, "bytes_reclaimed": reclaimed}
+
+    async def purge_archive(self, today: date = None) -> Dict[str, int]:
+        """Drop archived conversations older than retention_days"""
+        today = today or date.today()
+        cutoff = today - timedelta(days=self.retention_days)
+        if not self.partitioned:
+            async with self.pool.connection() as conn:
+                cur = await conn.execute(
+                    f"""
+                    WITH purged AS (
+                        DELETE FROM {self.archive_table}
+                        WHERE archived_at < %s
+                        RETURNING pg_column_size(conversation) AS size
+                    )
+                    SELECT COUNT(*), COALESCE(SUM(size), 0) FROM purged
+                    """,
+                    (cutoff,),
+                )
+                count, size = await cur.fetchone()
+            return {"purged": count, "bytes_reclaimed": size}
+
+        await self._ensure_partitions(today)
+        purged = 0
+        reclaimed = 0
+        async with self.pool.connection() as conn:
+            cur = await conn.execute(
+                """
+                SELECT c.relname, pg_total_relation_size(c.oid)
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                JOIN pg_class p ON p.oid = i.inhparent
+                WHERE p.relname = %s
+                """,
+                (self.archive_table,),
+            )
+            prefix = f"{self.archive_table}_p"
+            for name, size in await cur.fetchall():
+                try:
+                    month = datetime.strptime(name[len(prefix) :], "%Y%m").date()
+                except ValueError:
+                    continue
+                partition_end = (month + timedelta(days=32)).replace(day=1)
+                if partition_end <= cutoff:
+                    await conn.execute(f"DROP TABLE {name}")
+                    purged += 1
+                    reclaimed += size
+                    logger.info("Dropped archive partition %s (%s bytes)", name, size)
+        return {"purged_partitions": purged, "bytes_reclaimed": reclaimed}
+
+    async def run_once(self) -> Dict[str, int]:
+        """Run archival, compaction and purge once, unless another replica is"""
+        async with self.pool.connection() as lock_conn:
+            cur = await lock_conn.execute(
+                "SELECT pg_try_advisory_lock(%s)", (RETENTION_LOCK_KEY,)
+            )
+            (locked,) = await cur.fetchone()
+            await lock_conn.commit()
+            if not locked:
+                logger.info("Retention job already running elsewhere, skipping")
+                return {"bytes_reclaimed": 0}
+            try:
+                await self._create_table()
+                report = {"bytes_reclaimed": 0}
+                for step in (
+                    self.archive_finished,
+                    self.compact_long_conversations,
+                    self.purge_archive,
+                ):
+                    result = await step()
+                    report["bytes_reclaimed"] += result.pop("bytes_reclaimed")
+                    report.update(result)
+            finally:
+                await lock_conn.execute(
+                    "SELECT pg_advisory_unlock(%s)", (RETENTION_LOCK_KEY,)
+                )
+        metrics.incr("history.retention.bytes_reclaimed", report["bytes_reclaimed"])
+        logger.info("Conversation retention run finished: %s", report)
+        return report
+
+    async def start(self):
+        """Run the job every `interval` seconds in the background"""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="history-retention")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Conversation retention run failed: %s", e)
@@ -0,0 +1,37 @@
+import ast
+import json
+from typing import Dict
+
+
+def as_turn(value) -> Dict:
+    """Wrap non-object values so every stored turn is a JSON object"""
+    return value if isinstance(value, dict) else {"value": value}
+
+
+def normalize_turn(conversation) -> Dict:
+    """Automatic str->dict handling for a turn about to be stored"""
+    if isinstance(conversation, str):
+        try:
+            conversation = json.loads(conversation)
+        except json.JSONDecodeError:
+            conversation = {"text": conversation}
+    return as_turn(conversation)
+
+
+def unwrap_turn(turn) -> Dict:
+    """
+    Return a history turn as a dict. Turns stored before history was kept as
+    JSON hold the agent response as a Python repr under `text`.
+    """
+    if not isinstance(turn, dict):
+        return {}
+    text = turn.get("text")
+    if len(turn) == 1 and isinstance(text, str) and text.lstrip().startswith("{"):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                parsed = parse(text)
+            except (ValueError, SyntaxError):
+                continue
+            if isinstance(parsed, dict):
+                return parsed
+    return turn
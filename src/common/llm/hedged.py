@@ -0,0 +1,177 @@
+import asyncio
+from typing import AsyncGenerator, List, Optional
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from src.common.config.config import OrchestratorConfig
+from src.common.context.deadline import time_left
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("HedgedLlm")
+
+PRIMARY = "primary"
+HEDGE = "hedge"
+FALLBACK = "fallback"
+
+
+class _Attempt:
+    """One model request running in its own task, feeding a queue"""
+
+    def __init__(self, path: str, llm: BaseLlm, llm_request: LlmRequest, stream: bool):
+        self.path = path
+        self.llm = llm
+        self.error: Optional[BaseException] = None
+        self.started = asyncio.get_running_loop().time()
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._pump(llm_request, stream))
+
+    async def _pump(self, llm_request: LlmRequest, stream: bool):
+        try:
+            async for response in self.llm.generate_content_async(
+                llm_request, stream=stream
+            ):
+                await self.queue.put(("item", response))
+            await self.queue.put(("done", None))
+        except Exception as e:
+            await self.queue.put(("error", e))
+
+    def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+
+
+async def _next_event(attempts: List[_Attempt], timeout: float):
+    """First queued event among the attempts, or None after `timeout`"""
+    getters = {asyncio.ensure_future(a.queue.get()): a for a in attempts}
+    try:
+        done, _ = await asyncio.wait(
+            getters, timeout=max(timeout, 0), return_when=asyncio.FIRST_COMPLETED
+        )
+    finally:
+        for getter in getters:
+            getter.cancel()
+    # Prefer an answer over an error when both arrived together
+    events = sorted(
+        ((getters[getter], *getter.result()) for getter in done),
+        key=lambda event: event[1] == "error",
+    )
+    for attempt, kind, value in events[1:]:
+        if kind == "error":
+            attempt.error = value
+    return events[0] if events else None
+
+
+class HedgedLlm(BaseLlm):
+    """
+    Deadline-bounded model calls with hedging and a fallback provider.
+
+    If the first response has not arrived after the model's p95
+    first-response latency, an identical second request is sent and the
+    first of the two to answer wins. When neither answers before the
+    deadline, or both fail, the request goes to the fallback model under a
+    fresh deadline. Losing requests are cancelled and the winning path is
+    counted under llm.path.<path>.
+    """
+
+    llm: BaseLlm
+    fallback: Optional[BaseLlm] = None
+    deadline: float = OrchestratorConfig.LLM_DEADLINE
+    hedge: bool = OrchestratorConfig.LLM_HEDGE_ENABLED
+
+    def __init__(self, llm: BaseLlm, **kwargs):
+        super().__init__(model=llm.model, llm=llm, **kwargs)
+
+    def _hedge_delay(self) -> float:
+        p95_ms = metrics.quantile(f"llm.first_response_ms.{self.model}", 0.95)
+        if p95_ms is None:
+            return OrchestratorConfig.LLM_HEDGE_DEFAULT_DELAY
+        return max(p95_ms / 1000, OrchestratorConfig.LLM_HEDGE_MIN_DELAY)
+
+    async def _race(self, llm_request: LlmRequest, stream: bool, attempts: list):
+        """Run the primary (and maybe a hedge) until one answers or time runs out"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_left(self.deadline)
+        attempts.append(_Attempt(PRIMARY, self.llm, llm_request, stream))
+        hedge_at = loop.time() + self._hedge_delay() if self.hedge else None
+        while True:
+            live = [a for a in attempts if a.error is None]
+            if not live:
+                # Failures are not hedged: a second identical request to the
+                # same provider is unlikely to fare better
+                return None, None
+            if hedge_at is not None and loop.time() >= hedge_at:
+                hedge_at = None
+                attempts.append(_Attempt(HEDGE, self.llm, llm_request, stream))
+                metrics.incr("llm.hedge.sent")
+                continue
+            if loop.time() >= deadline:
+                metrics.incr("llm.deadline_exceeded")
+                return None, None
+            wake = min(deadline, hedge_at) if hedge_at is not None else deadline
+            event = await _next_event(live, wake - loop.time())
+            if event is None:
+                continue
+            attempt, kind, value = event
+            if kind == "error":
+                logger.warning(f"{attempt.path} call to {self.model} failed: {value}")
+                attempt.error = value
+                continue
+            return attempt, (kind, value, deadline)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        loop = asyncio.get_running_loop()
+        attempts: List[_Attempt] = []
+        try:
+            winner, first = await self._race(llm_request, stream, attempts)
+            for attempt in attempts:
+                if attempt is not winner:
+                    attempt.cancel()
+
+            if winner is None:
+                if self.fallback is None:
+                    errors = [a.error for a in attempts if a.error is not None]
+                    if errors:
+                        raise errors[-1]
+                    raise TimeoutError(
+                        f"{self.model} did not answer within {self.deadline}s"
+                    )
+                logger.info(f"Falling back from {self.model} to {self.fallback.model}")
+                winner = _Attempt(FALLBACK, self.fallback, llm_request, stream)
+                attempts.append(winner)
+                deadline = loop.time() + time_left(self.deadline)
+                try:
+                    kind, value = await asyncio.wait_for(
+                        winner.queue.get(), deadline - loop.time()
+                    )
+                except asyncio.TimeoutError:
+                    metrics.incr("llm.deadline_exceeded")
+                    raise TimeoutError(
+                        f"{self.fallback.model} did not answer within {self.deadline}s"
+                    )
+            else:
+                kind, value, deadline = first
+                metrics.observe(
+                    f"llm.first_response_ms.{self.model}",
+                    (loop.time() - winner.started) * 1000,
+                )
+
+            metrics.incr(f"llm.path.{winner.path}")
+            while kind == "item":
+                yield value
+                try:
+                    kind, value = await asyncio.wait_for(
+                        winner.queue.get(), max(deadline - loop.time(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    metrics.incr("llm.deadline_exceeded")
+                    raise TimeoutError(
+                        f"{winner.llm.model} did not finish within {self.deadline}s"
+                    )
+            if kind == "error":
+                raise value
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
@@ -0,0 +1,57 @@
+import json
+from typing import Dict, List
+import litellm
+from src.common.metrics.metrics import metrics
+
+
+def compact_json(value) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class PromptAssembler:
+    """
+    Renders the orchestrator prompt as a stable prefix plus a per-request
+    history section.
+
+    The prefix (routing rules, agent list and cards) only changes when the
+    registry does, so the provider can serve it from its prompt cache. The
+    history is trimmed newest-first to a token budget instead of a fixed
+    number of turns.
+    """
+
+    def __init__(self, model: str, instruction: str, history: str, budget: int):
+        self.model = model
+        self.instruction = instruction
+        self.history = history
+        self.budget = budget
+        self._prefix_tokens: tuple[str, int] = ("", 0)
+
+    def count_tokens(self, text: str) -> int:
+        return litellm.token_counter(model=self.model, text=text)
+
+    def static_prefix(self, agentlist: List[str], agentcards: List[Dict]) -> str:
+        prefix = self.instruction.format(
+            agentlist=compact_json(agentlist), agentcards=compact_json(agentcards)
+        )
+        # The prefix rarely changes, only count it again when it does
+        if self._prefix_tokens[0] != prefix:
+            self._prefix_tokens = (prefix, self.count_tokens(prefix))
+        metrics.observe("prompt.prefix_tokens", self._prefix_tokens[1])
+        return prefix
+
+    def history_section(self, turns: List[Dict]) -> str:
+        """Newest turns that fit the budget, always keeping the latest one"""
+        kept: List[str] = []
+        used = 0
+        for turn in reversed(turns):
+            serialized = compact_json(turn)
+            tokens = self.count_tokens(serialized)
+            if kept and used + tokens > self.budget:
+                break
+            kept.append(serialized)
+            used += tokens
+        metrics.observe("prompt.history_tokens", used)
+        metrics.observe("prompt.history_turns", len(kept))
+        return self.history.format(
+            conversation_history="[" + ",".join(reversed(kept)) + "]"
+        )
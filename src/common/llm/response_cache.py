@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import AsyncGenerator, List, Optional
+import redis.asyncio as redis
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import Field, PrivateAttr
+from src.common.config.config import DeadlineConfig, LlmCacheConfig
+from src.common.context.deadline import within_deadline
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("LlmResponseCache")
+
+
+def request_key(model: str, llm_request: LlmRequest) -> str:
+    """Hash of everything the model sees: prompt, contents and tool schema"""
+    payload = {
+        "model": model,
+        "contents": [
+            content.model_dump(mode="json", exclude_none=True)
+            for content in llm_request.contents
+        ],
+        "config": llm_request.config.model_dump(mode="json", exclude_none=True),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class MemoryResponseCache:
+    """In-process LRU of final LLM responses with a TTL per entry"""
+
+    def __init__(
+        self,
+        max_entries: int = LlmCacheConfig.MAX_ENTRIES,
+        ttl: float = LlmCacheConfig.TTL,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, List[LlmResponse]]] = OrderedDict()
+
+    async def get(self, key: str) -> Optional[List[LlmResponse]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, responses = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return responses
+
+    async def set(self, key: str, responses: List[LlmResponse]):
+        self._entries[key] = (time.monotonic() + self.ttl, responses)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            metrics.incr("llm.cache.evictions")
+        metrics.set_gauge("llm.cache.entries", len(self._entries))
+
+
+class RedisResponseCache:
+    """Responses shared across replicas; Redis handles TTL and eviction"""
+
+    def __init__(
+        self,
+        url: str = LlmCacheConfig.REDIS_URL,
+        ttl: float = LlmCacheConfig.TTL,
+        prefix: str = "llm-response:",
+    ):
+        self.client = redis.from_url(url, decode_responses=True)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[List[LlmResponse]]:
+        try:
+            cached = await within_deadline(
+                self.client.get(self.prefix + key), DeadlineConfig.REDIS_TIMEOUT
+            )
+        except (redis.RedisError, TimeoutError) as e:
+            logger.warning(f"Redis response cache read failed: {e}")
+            return None
+        if cached is None:
+            return None
+        return [LlmResponse.model_validate(item) for item in json.loads(cached)]
+
+    async def set(self, key: str, responses: List[LlmResponse]):
+        payload = json.dumps(
+            [
+                response.model_dump(mode="json", exclude_none=True)
+                for response in responses
+            ]
+        )
+        try:
+            await within_deadline(
+                self.client.set(self.prefix + key, payload, ex=int(self.ttl)),
+                DeadlineConfig.REDIS_TIMEOUT,
+            )
+        except (redis.RedisError, TimeoutError) as e:
+            logger.warning(f"Redis response cache write failed: {e}")
+
+
+def create_response_cache():
+    if LlmCacheConfig.BACKEND == "redis":
+        return RedisResponseCache()
+    return MemoryResponseCache()
+
+
+class CachedLlm(BaseLlm):
+    """
+    Wraps a model with a response cache and single-flight coalescing.
+
+    Identical requests (same prompt, contents and tool schema) within the
+    TTL are answered from the cache, and concurrent identical requests wait
+    for the one in flight instead of calling the model again. Only final,
+    error-free responses are cached; a hit replays them without the
+    streamed partial chunks.
+    """
+
+    llm: BaseLlm
+    cache: object = Field(default_factory=create_response_cache)
+    _inflight: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, llm: BaseLlm, **kwargs):
+        super().__init__(model=llm.model, llm=llm, **kwargs)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = request_key(self.model, llm_request)
+        cached = await self.cache.get(key)
+        if cached is None and key in self._inflight:
+            metrics.incr("llm.cache.coalesced")
+            cached = await asyncio.shield(self._inflight[key])
+        if cached is not None:
+            metrics.incr("llm.cache.hits")
+            for response in cached:
+                yield response.model_copy(deep=True)
+            return
+
+        metrics.incr("llm.cache.misses")
+        # Followers of an abandoned or failed call get None and call the
+        # model themselves
+        leader = key not in self._inflight
+        if leader:
+            self._inflight[key] = asyncio.get_running_loop().create_future()
+        responses: List[LlmResponse] = []
+        shared = None
+        try:
+            async for response in self.llm.generate_content_async(
+                llm_request, stream=stream
+            ):
+                if not response.partial:
+                    responses.append(response)
+                yield response
+            if responses and not any(r.error_code for r in responses):
+                await self.cache.set(key, responses)
+                shared = responses
+        finally:
+            if leader:
+                self._inflight.pop(key).set_result(shared)
@@ -0,0 +1,193 @@
+import time
+import litellm
+from typing import AsyncGenerator, List, Optional
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from src.common.context.turn_context import current_turn
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("TieredLlm")
+
+
+def awaiting_tool_call(llm_request: LlmRequest) -> bool:
+    """
+    True when the answer must be a tool call: the router answers the user
+    message with one, plain text is only expected once a tool result is in
+    the contents.
+    """
+    return bool(llm_request.tools_dict) and not any(
+        part.function_response
+        for content in llm_request.contents
+        for part in content.parts or []
+    )
+
+
+def malformed_reason(
+    llm_request: LlmRequest, responses: List[LlmResponse]
+) -> Optional[str]:
+    """Why a model's answer cannot be used, or None if it looks well formed"""
+    if not responses:
+        return "empty"
+    if any(response.error_code for response in responses):
+        return "error"
+    calls = [
+        part.function_call
+        for response in responses
+        if response.content
+        for part in response.content.parts or []
+        if part.function_call
+    ]
+    if not calls:
+        has_text = any(
+            part.text and part.text.strip()
+            for response in responses
+            if response.content
+            for part in response.content.parts or []
+        )
+        if awaiting_tool_call(llm_request):
+            return "no_tool_call"
+        return None if has_text else "empty"
+    for call in calls:
+        tool = llm_request.tools_dict.get(call.name)
+        if tool is None:
+            return "unknown_tool"
+        declaration = tool._get_declaration()
+        parameters = declaration.parameters if declaration else None
+        required = (parameters.required if parameters else None) or []
+        if any(name not in (call.args or {}) for name in required):
+            return "missing_args"
+    return None
+
+
+def record_cost(model: str, response: LlmResponse):
+    usage = response.usage_metadata
+    # Models missing from litellm's price map are not costed
+    if usage is None or model.split("/")[-1] not in litellm.model_cost:
+        return
+    try:
+        prompt_cost, completion_cost = litellm.cost_per_token(
+            model=model,
+            prompt_tokens=usage.prompt_token_count or 0,
+            completion_tokens=usage.candidates_token_count or 0,
+        )
+    except Exception:
+        return
+    metrics.incr(f"llm.tier.{model}.cost_usd", prompt_cost + completion_cost)
+
+
+class TieredLlm(BaseLlm):
+    """
+    Tries the cheapest model tier first and escalates to the next one when
+    its answer is unusable (error, missing or malformed tool call).
+
+    The starting tier comes from the current turn, so the orchestrator can
+    skip the fast tier for ambiguous or emergency-triage messages. Answers
+    from every tier but the last are buffered so a rejected answer never
+    reaches the caller; the last tier streams as usual.
+
+    Buffering only applies when the answer must be a tool call, which is
+    what the escalation check validates. Other streamed requests (the
+    answer after a tool result) stream from the first tier too and only
+    escalate if it fails before yielding anything.
+    """
+
+    tiers: List[BaseLlm]
+
+    def __init__(self, tiers: List[BaseLlm], **kwargs):
+        super().__init__(
+            model=",".join(tier.model for tier in tiers), tiers=tiers, **kwargs
+        )
+
+    def _start_tier(self) -> int:
+        try:
+            tier = current_turn().model_tier
+        except RuntimeError:
+            tier = 0
+        return min(max(tier, 0), len(self.tiers) - 1)
+
+    @staticmethod
+    def _escalate(tier: int):
+        """Keep later calls of the same turn on the tier that worked"""
+        try:
+            turn = current_turn()
+        except RuntimeError:
+            return
+        turn.model_tier = max(turn.model_tier, tier)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        start = self._start_tier()
+        for idx in range(start, len(self.tiers)):
+            tier = self.tiers[idx]
+            last = idx == len(self.tiers) - 1
+            started = time.perf_counter()
+            metrics.incr(f"llm.tier.{tier.model}.calls")
+
+            if last:
+                try:
+                    async for response in tier.generate_content_async(
+                        llm_request, stream=stream
+                    ):
+                        record_cost(tier.model, response)
+                        yield response
+                finally:
+                    metrics.observe(
+                        f"llm.tier.{tier.model}.ms",
+                        (time.perf_counter() - started) * 1000,
+                    )
+                return
+
+            if stream and not awaiting_tool_call(llm_request):
+                yielded = False
+                try:
+                    async for response in tier.generate_content_async(
+                        llm_request, stream=True
+                    ):
+                        record_cost(tier.model, response)
+                        yielded = True
+                        yield response
+                    reason = None if yielded else "empty"
+                except Exception as e:
+                    if yielded:
+                        raise
+                    logger.warning(f"Model tier {tier.model} failed: {e}")
+                    reason = "exception"
+                finally:
+                    metrics.observe(
+                        f"llm.tier.{tier.model}.ms",
+                        (time.perf_counter() - started) * 1000,
+                    )
+                if reason is None:
+                    return
+                logger.info(f"Escalating from {tier.model}: {reason}")
+                metrics.incr(f"llm.tier.escalations.{reason}")
+                self._escalate(idx + 1)
+                continue
+
+            responses: List[LlmResponse] = []
+            try:
+                responses = [
+                    response
+                    async for response in tier.generate_content_async(
+                        llm_request, stream=False
+                    )
+                ]
+                reason = malformed_reason(llm_request, responses)
+            except Exception as e:
+                logger.warning(f"Model tier {tier.model} failed: {e}")
+                reason = "exception"
+            metrics.observe(
+                f"llm.tier.{tier.model}.ms", (time.perf_counter() - started) * 1000
+            )
+            for response in responses:
+                record_cost(tier.model, response)
+            if reason is None:
+                for response in responses:
+                    yield response
+                return
+            logger.info(f"Escalating from {tier.model}: {reason}")
+            metrics.incr(f"llm.tier.escalations.{reason}")
+            self._escalate(idx + 1)
@@ -0,0 +1,51 @@
+import litellm
+from litellm.integrations.custom_logger import CustomLogger
+from src.common.context.turn_context import current_turn
+from src.common.logger.logger import get_logger
+from src.common.metrics.metrics import metrics
+
+logger = get_logger("LlmUsage")
+
+
+class PromptUsageLogger(CustomLogger):
+    """
+    Records prompt tokens per LLM call and the share served from the
+    provider's prompt cache (Anthropic cache reads).
+    """
+
+    async def async_log_success_event(self, kwargs, response_obj, start_time, end_time):
+        usage = getattr(response_obj, "usage", None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        cached_tokens = getattr(usage, "cache_read_input_tokens", 0) or 0
+        written_tokens = getattr(usage, "cache_creation_input_tokens", 0) or 0
+
+        metrics.observe("llm.prompt_tokens", prompt_tokens)
+        metrics.incr("llm.prompt_tokens_total", prompt_tokens)
+        metrics.incr("llm.prompt_cache.read_tokens_total", cached_tokens)
+        metrics.incr("llm.prompt_cache.write_tokens_total", written_tokens)
+        total = metrics.counter("llm.prompt_tokens_total")
+        if total:
+            metrics.set_gauge(
+                "llm.prompt_cache.hit_ratio",
+                metrics.counter("llm.prompt_cache.read_tokens_total") / total,
+            )
+
+        try:
+            context_id = current_turn().context_id
+        except RuntimeError:
+            context_id = None
+        logger.info(
+            f"LLM call for context {context_id}: "
+            f"model={kwargs.get('model')} prompt_tokens={prompt_tokens} "
+            f"cache_read={cached_tokens} cache_write={written_tokens}"
+        )
+
+
+prompt_usage_logger = PromptUsageLogger()
+
+
+def register_prompt_usage_logger():
+    if prompt_usage_logger not in litellm.callbacks:
+        litellm.callbacks.append(prompt_usage_logger)
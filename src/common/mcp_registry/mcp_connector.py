@@ -5,15 +5,56 @@ import logging
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset
 from google.adk.tools.mcp_tool import StdioConnectionParams
 from google.adk.tools.mcp_tool.mcp_session_manager import StreamableHTTPServerParams
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
 import json
 from mcp import StdioServerParameters
 import os
+from typing import Any, Optional
+from src.common.config.config import DeadlineConfig
+from src.common.context.deadline import retry, time_left, within_deadline
 
 # ADDED: Configure logging for MCP cleanup issues to reduce noise during shutdown
 logging.getLogger("mcp").setLevel(logging.ERROR)
 logger = logging.getLogger(__name__)
 
 
+class BoundedMCPTool(BaseTool):
+    """An MCP tool whose calls are bounded by the turn budget"""
+
+    def __init__(self, tool: BaseTool):
+        super().__init__(
+            name=tool.name,
+            description=tool.description,
+            is_long_running=tool.is_long_running,
+            custom_metadata=tool.custom_metadata,
+        )
+        self._tool = tool
+
+    def _get_declaration(self):
+        return self._tool._get_declaration()
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext):
+        return await within_deadline(
+            self._tool.run_async(args=args, tool_context=tool_context),
+            DeadlineConfig.MCP_TIMEOUT,
+        )
+
+
+class BoundedMCPToolset(MCPToolset):
+    """
+    MCPToolset whose tool listing and tool calls each get at most
+    MCP_TIMEOUT seconds, and never more than the turn has left
+    """
+
+    async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None):
+        tools = await within_deadline(
+            super().get_tools(readonly_context), DeadlineConfig.MCP_TIMEOUT
+        )
+        return [BoundedMCPTool(tool) for tool in tools]
+
+
 class MCPConnector:
     """
     Discovers the MCP servers from the config.
@@ -46,13 +87,18 @@ class MCPConnector:
             logger.info(server)
             try:
                 conn = StreamableHTTPServerParams(url=server)
-                toolset = await asyncio.wait_for(
-                    MCPToolset(connection_params=conn).get_tools(), timeout=10.0
+                toolset = await retry(
+                    lambda: asyncio.wait_for(
+                        MCPToolset(connection_params=conn).get_tools(),
+                        timeout=time_left(DeadlineConfig.MCP_TIMEOUT),
+                    ),
+                    "mcp.list_tools",
+                    retry_on=(asyncio.TimeoutError, ConnectionError),
                 )
 
                 if toolset:
                     # Create the actual toolset object for caching
-                    mcp_toolset = MCPToolset(connection_params=conn)
+                    mcp_toolset = BoundedMCPToolset(connection_params=conn)
                     tool_names = [tool.name for tool in toolset]
                     # print(
                     #     f"[bold green]Loaded tools from server [cyan]'{name}'[/cyan]:[/bold green] {', '.join(tool_names)}"
@@ -0,0 +1,77 @@
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+class Metrics:
+    """
+    In-process counters and latency summaries.
+
+    Counters are monotonically increasing totals, observations keep a running
+    count/sum/max plus a bounded window of recent samples for quantiles.
+    Everything is exposed as a plain dict through `snapshot()`.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._window = window
+        self._counters: dict[str, float] = defaultdict(float)
+        self._gauges: dict[str, float] = {}
+        self._samples: dict[str, deque] = defaultdict(
+            lambda: deque(maxlen=self._window)
+        )
+        self._totals: dict[str, dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1.0) -> None:
+        """Increment a counter"""
+        self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a point-in-time value"""
+        self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Record a single observation (usually a latency in ms)"""
+        self._samples[name].append(value)
+        totals = self._totals.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+        totals["count"] += 1
+        totals["sum"] += value
+        totals["max"] = max(totals["max"], value)
+
+    def quantile(self, name: str, q: float) -> float | None:
+        """Return the q-quantile (0..1) of the recent window, None if empty"""
+        samples = self._samples.get(name)
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+    def counter(self, name: str) -> float:
+        return self._counters.get(name, 0.0)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Observe the wall time of the wrapped block in milliseconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def snapshot(self) -> dict:
+        observations = {}
+        for name, totals in self._totals.items():
+            observations[name] = {
+                **totals,
+                "avg": totals["sum"] / totals["count"] if totals["count"] else 0.0,
+                "p50": self.quantile(name, 0.50),
+                "p95": self.quantile(name, 0.95),
+            }
+        return {
+            "counters": dict(self._counters),
+            "gauges": dict(self._gauges),
+            "observations": observations,
+        }
+
+
+metrics = Metrics()
@@ -0,0 +1,65 @@
+import asyncio
+from mcp.types import CallToolResult, TextContent
+from src.agents.OrchestratorAgent.agent import OrchestratorAgent
+from src.agents.OrchestratorAgent.routing_rules import OPERATOR_HANDOFF, RouteDecision
+from src.common.context.turn_context import TurnContext, turn_scope
+
+
+class StubHandoffTool:
+    """Stands in for the MCP operator_handoff tool"""
+
+    name = OPERATOR_HANDOFF
+
+    def __init__(self, result: CallToolResult):
+        self.result = result
+        self.calls = []
+
+    async def run_async(self, args, tool_context):
+        self.calls.append(args)
+        return self.result
+
+
+class StubToolset:
+    def __init__(self, tool):
+        self.tool = tool
+
+    async def get_tools(self):
+        return [self.tool]
+
+
+def run_handoff(monkeypatch, result: CallToolResult):
+    monkeypatch.setattr(OrchestratorAgent, "_build_model", lambda self: None)
+    agent = OrchestratorAgent()
+    tool = StubHandoffTool(result)
+    agent._mcp_tools = [StubToolset(tool)]
+    turn = TurnContext(
+        context_id="context-1", user_id="user-1", role="user", query="help"
+    )
+    decision = RouteDecision(action="handoff", summary="Caller needs an operator")
+
+    async def run():
+        with turn_scope(turn):
+            return await agent._run_fast_path(decision, turn)
+
+    return asyncio.run(run()), tool
+
+
+def test_mcp_handoff_answer_is_the_turn_answer(monkeypatch):
+    result = CallToolResult(
+        content=[TextContent(type="text", text="Operator handoff initiated")]
+    )
+    answer, tool = run_handoff(monkeypatch, result)
+
+    assert answer == "Operator handoff initiated"
+    assert tool.calls == [{"summary": "Caller needs an operator"}]
+
+
+def test_failed_mcp_handoff_falls_back_to_the_llm(monkeypatch):
+    result = CallToolResult(
+        content=[TextContent(type="text", text="operator queue unavailable")],
+        isError=True,
+    )
+    answer, tool = run_handoff(monkeypatch, result)
+
+    assert answer is None
+    assert len(tool.calls) == 1
@@ -0,0 +1,59 @@
+import asyncio
+from src.common.db.history_cache import HistoryCache
+
+
+class Store:
+    """Conversation rows as another replica would see them"""
+
+    def __init__(self):
+        self.turns = []
+        self.loads = 0
+
+    async def load(self, context_id, n):
+        self.loads += 1
+        return list(self.turns[-n:])
+
+    async def version(self, context_id):
+        return len(self.turns)
+
+
+def test_cached_history_is_reloaded_after_another_replica_appends():
+    cache = HistoryCache(ttl=300)
+    store = Store()
+    store.turns = [{"query": "first"}]
+
+    async def run():
+        history = await cache.get_or_load("context-1", 8, store.load, store.version)
+        assert history == [{"query": "first"}]
+
+        # Appended through this replica: write-through keeps the entry current
+        store.turns.append({"query": "second"})
+        cache.append("context-1", {"query": "second"})
+        history = await cache.get_or_load("context-1", 8, store.load, store.version)
+        assert history == [{"query": "first"}, {"query": "second"}]
+        assert store.loads == 1
+
+        # Appended through another replica: the entry is stale
+        store.turns.append({"query": "third"})
+        history = await cache.get_or_load("context-1", 8, store.load, store.version)
+        assert history[-1] == {"query": "third"}
+        assert store.loads == 2
+
+    asyncio.run(run())
+
+
+def test_cached_history_is_served_when_the_check_fails():
+    cache = HistoryCache(ttl=300)
+    store = Store()
+    store.turns = [{"query": "first"}]
+
+    async def unavailable(context_id):
+        raise ConnectionError("database unavailable")
+
+    async def run():
+        await cache.get_or_load("context-1", 8, store.load, store.version)
+        history = await cache.get_or_load("context-1", 8, store.load, unavailable)
+        assert history == [{"query": "first"}]
+        assert store.loads == 1
+
+    asyncio.run(run())
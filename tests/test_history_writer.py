@@ -0,0 +1,80 @@
+import asyncio
+from src.common.config.config import DatabaseConfig
+from src.common.db.history_cache import HistoryCache
+from src.common.db.history_writer import HistoryWriter
+
+
+class FlakyManager:
+    """
+    Stores turns in memory. A batch holding a poison turn fails as a
+    whole, `failures[query]` more times (forever for None).
+    """
+
+    def __init__(self, failures: dict):
+        self.failures = failures
+        self.rows = []
+
+    async def store_many(self, turns):
+        for _, _, turn in turns:
+            query = turn["query"]
+            if query in self.failures:
+                left = self.failures[query]
+                if left is None:
+                    raise ValueError(f"cannot store {query}")
+                if left > 0:
+                    self.failures[query] = left - 1
+                    raise ConnectionError(f"cannot store {query} yet")
+        self.rows.extend(
+            (conversation_id, turn["query"]) for _, conversation_id, turn in turns
+        )
+
+
+def fast_retries(monkeypatch, max_requeues=10):
+    monkeypatch.setattr(DatabaseConfig, "HISTORY_FLUSH_RETRIES", 1)
+    monkeypatch.setattr(DatabaseConfig, "HISTORY_FLUSH_BACKOFF", 0.001)
+    monkeypatch.setattr(DatabaseConfig, "HISTORY_FLUSH_MAX_REQUEUES", max_requeues)
+
+
+async def write(writer: HistoryWriter, turns: list[tuple[str, str]]):
+    await writer.start()
+    for conversation_id, query in turns:
+        await writer.submit("user-1", conversation_id, {"query": query})
+    for conversation_id in {conversation_id for conversation_id, _ in turns}:
+        await asyncio.wait_for(writer.barrier(conversation_id), 5)
+    await writer.stop()
+
+
+def test_poison_row_keeps_conversation_order(monkeypatch):
+    fast_retries(monkeypatch)
+    manager = FlakyManager({"a1": 3})
+    writer = HistoryWriter(
+        manager=manager, batch_size=10, flush_interval=0.01, cache=HistoryCache()
+    )
+    turns = [("A", "a1"), ("B", "b1"), ("A", "a2"), ("B", "b2"), ("A", "a3")]
+
+    asyncio.run(write(writer, turns))
+
+    assert [row for row in manager.rows if row[0] == "A"] == [
+        ("A", "a1"),
+        ("A", "a2"),
+        ("A", "a3"),
+    ]
+    # The other conversation does not wait for the poison row
+    assert manager.rows.index(("B", "b2")) < manager.rows.index(("A", "a1"))
+
+
+def test_give_up_invalidates_the_cache(monkeypatch):
+    fast_retries(monkeypatch, max_requeues=2)
+    manager = FlakyManager({"a1": None})
+    cache = HistoryCache()
+    cache.fill("A", [{"query": "a0"}])
+    writer = HistoryWriter(
+        manager=manager, batch_size=10, flush_interval=0.01, cache=cache
+    )
+
+    asyncio.run(write(writer, [("A", "a1"), ("A", "a2"), ("B", "b1")]))
+
+    assert manager.rows == [("B", "b1"), ("A", "a2")]
+    # The cached history holds a turn that was never stored
+    assert cache.get("A", 8) is None
+    assert writer.pending("A") == 0
@@ -0,0 +1,69 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from src.common.db.Postgre import ConversationHistoryManager
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        pass
+
+    async def fetchmany(self, size):
+        rows, self.pool.legacy_rows = self.pool.legacy_rows, []
+        return rows
+
+    async def executemany(self, sql, params):
+        self.pool.written.extend(params)
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def cursor(self, name=None):
+        return FakeCursor(self.pool)
+
+
+class FakePool:
+    """Serves legacy rows to the migration and records the turns it writes"""
+
+    def __init__(self, legacy_rows):
+        self.legacy_rows = legacy_rows
+        self.written = []
+
+    @asynccontextmanager
+    async def connection(self):
+        yield FakeConnection(self)
+
+
+def test_migration_unwraps_repr_wrapped_turns():
+    agent_turn = {
+        "agent": "FireAgent",
+        "response": "Units are on the way",
+        "next_agent": "finish",
+    }
+    legacy = json.dumps(
+        [
+            {"role": "user", "query": "There is a fire"},
+            {"text": repr(agent_turn)},
+            "plain text turn",
+        ]
+    )
+    pool = FakePool([("user-1", "context-1", legacy, "2024-01-01")])
+
+    migrated = asyncio.run(ConversationHistoryManager(pool).migrate_legacy_blobs())
+
+    assert migrated == 3
+    turns = {seq: turn.obj for _, seq, _, turn, _ in pool.written}
+    assert turns[1] == {"role": "user", "query": "There is a fire"}
+    assert turns[2] == agent_turn
+    assert turns[3] == {"text": "plain text turn"}
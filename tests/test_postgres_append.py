@@ -0,0 +1,45 @@
+import asyncio
+import os
+import uuid
+import pytest
+from src.common.db.Postgre import ConversationHistoryManager
+from src.common.db.pool import PostgresPool
+
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+APPENDS = 50
+
+pytestmark = pytest.mark.skipif(not DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+def test_concurrent_appends_get_consecutive_seqs():
+    async def run():
+        pool = PostgresPool(database_url=DATABASE_URL, min_size=1, max_size=10)
+        manager = ConversationHistoryManager(pool)
+        suffix = uuid.uuid4().hex[:8]
+        manager.turns_table = f"test_turns_{suffix}"
+        manager.heads_table = f"test_heads_{suffix}"
+        await manager._create_table()
+        try:
+            await asyncio.gather(
+                *(
+                    manager.store("user-1", "context-1", {"query": f"message {i}"})
+                    for i in range(APPENDS)
+                )
+            )
+            async with pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        f"SELECT seq FROM {manager.turns_table} ORDER BY seq"
+                    )
+                    seqs = [seq for (seq,) in await cur.fetchall()]
+            return seqs, await manager.last_seq("context-1")
+        finally:
+            async with pool.connection() as conn:
+                await conn.execute(f"DROP TABLE {manager.turns_table}")
+                await conn.execute(f"DROP TABLE {manager.heads_table}")
+            await pool.close()
+
+    seqs, last_seq = asyncio.run(run())
+
+    assert seqs == list(range(1, APPENDS + 1))
+    assert last_seq == APPENDS
@@ -0,0 +1,43 @@
+import asyncio
+import pytest
+from src.agents.OrchestratorAgent.agent import OrchestratorAgent
+from src.common.agent_registry.routing_index import RouteMatch
+from src.common.config.config import OrchestratorConfig
+from src.common.context.turn_context import TurnContext
+
+
+class StubIndex:
+    """One agent with the triage skill id used by the orchestrator card"""
+
+    skills = {"TriageAgent": {"emergency_triage"}}
+
+    def has_skill(self, agent_name, skill):
+        return skill in self.skills.get(agent_name, ())
+
+
+class StubRegistry:
+    async def get_routing_index(self):
+        return StubIndex()
+
+
+@pytest.mark.parametrize(
+    "match, tier",
+    [
+        (None, 1),
+        (RouteMatch("FireAgent", score=0.5, confidence=0.05), 1),
+        (RouteMatch("FireAgent", score=4.0, confidence=0.9), 0),
+        (RouteMatch("TriageAgent", score=4.0, confidence=0.9), 2),
+    ],
+)
+def test_select_tier(monkeypatch, match, tier):
+    monkeypatch.setattr(OrchestratorConfig, "MODEL_TIERS", ["fast", "mid", "strong"])
+    monkeypatch.setattr(OrchestratorAgent, "_build_model", lambda self: None)
+    agent = OrchestratorAgent()
+    agent._agent_registry = StubRegistry()
+    turn = TurnContext(
+        context_id="context-1", user_id="user-1", role="user", query="help"
+    )
+    turn.route_match = match
+    turn.route_classified = True
+
+    assert asyncio.run(agent._select_tier(turn)) == tier
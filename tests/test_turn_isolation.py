@@ -0,0 +1,152 @@
+import asyncio
+import random
+from typing import AsyncGenerator
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from src.agents.OrchestratorAgent.agent import OrchestratorAgent
+from src.common.agent_registry.routing_index import RoutingIndex
+from src.common.config.config import OrchestratorConfig
+from src.common.context.turn_context import TurnContext, turn_scope
+
+TURNS = 200
+
+
+class StubModel(BaseLlm):
+    """Routes every message to FireAgent, then answers with the tool result"""
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        # Yield to other turns so their tool calls interleave
+        await asyncio.sleep(random.uniform(0, 0.01))
+        parts = [part for content in llm_request.contents for part in content.parts]
+        result = next(
+            (part.function_response for part in parts if part.function_response),
+            None,
+        )
+        if result is not None:
+            text = result.response["result"]
+            yield LlmResponse(
+                content=types.Content(role="model", parts=[types.Part(text=text)])
+            )
+            return
+        call = types.FunctionCall(
+            name="redirect_agent",
+            args={"agent_name": "FireAgent", "message": parts[-1].text},
+        )
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(function_call=call)])
+        )
+
+
+class StubCard:
+    name = "FireAgent"
+
+
+class StubRegistry:
+    async def find_card(self, agent_name):
+        return StubCard()
+
+    async def get_agents_list(self):
+        return ["FireAgent"]
+
+    async def get_context_cards(self):
+        return []
+
+    async def get_routing_index(self):
+        return RoutingIndex.build([])
+
+
+class StubAuth:
+    async def get_m2m_token(self, agent_name):
+        return "token"
+
+
+class StubConnector:
+    """Records the metadata of every delegation and echoes it back"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def send_task(self, matched_card, message, token, metadata):
+        await asyncio.sleep(random.uniform(0, 0.01))
+        self.calls.append((message, dict(metadata)))
+        return f"{metadata['user_id']}|{metadata['context_id']}"
+
+    async def stream_task(self, matched_card, message, token, metadata, updater=None):
+        return await self.send_task(matched_card, message, token, metadata)
+
+
+class StubMcp:
+    async def get_tools(self):
+        return []
+
+
+def build_agent(monkeypatch) -> tuple[OrchestratorAgent, StubConnector]:
+    monkeypatch.setattr(OrchestratorConfig, "FAST_PATH_ENABLED", False)
+    monkeypatch.setattr(
+        OrchestratorAgent, "_build_model", lambda self: StubModel(model="stub")
+    )
+    agent = OrchestratorAgent()
+    connector = StubConnector()
+    agent._agent_registry = StubRegistry()
+    agent._agent_auth = StubAuth()
+    agent._agent_connector = connector
+    agent._mcp_connector = StubMcp()
+
+    async def no_history(context_id, n):
+        return []
+
+    async def no_seq(context_id):
+        return 0
+
+    agent._load_history = no_history
+    agent._history_seq = no_seq
+    return agent, connector
+
+
+async def run_turn(agent: OrchestratorAgent, turn: TurnContext) -> str:
+    with turn_scope(turn):
+        async for item in agent.invoke(turn):
+            if item["is_task_complete"]:
+                return item["content"]
+    raise AssertionError(f"turn {turn.context_id} produced no final answer")
+
+
+def test_concurrent_turns_keep_their_own_identity(monkeypatch):
+    agent, connector = build_agent(monkeypatch)
+    turns = [
+        TurnContext(
+            context_id=f"context-{i}",
+            user_id=f"user-{i}",
+            role="user",
+            query=f"message {i}",
+        )
+        for i in range(TURNS)
+    ]
+
+    async def run_all():
+        await agent.initialize()
+        answers = await asyncio.gather(*(run_turn(agent, turn) for turn in turns))
+        session_service = agent._runner.session_service
+        sessions = [
+            await session_service.list_sessions(
+                app_name=agent._agent.name, user_id=turn.user_id
+            )
+            for turn in turns
+        ]
+        return answers, sessions
+
+    answers, sessions = asyncio.run(run_all())
+
+    assert len(connector.calls) == TURNS
+    for message, metadata in connector.calls:
+        i = int(message.rsplit(" ", 1)[-1])
+        assert metadata["user_id"] == f"user-{i}"
+        assert metadata["context_id"] == f"context-{i}"
+    for turn, answer in zip(turns, answers):
+        assert answer == f"{turn.user_id}|{turn.context_id}"
+    # Turn sessions are dropped once the turn ends
+    assert all(not listed.sessions for listed in sessions)